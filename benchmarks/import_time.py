@@ -0,0 +1,66 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+   Import-time benchmark: eager vs lazy binding of dwf.lowlevel
+
+   A stub libdwf.so which exports every FDwf* symbol used by dwf.lowlevel
+   is built with the C compiler, and "import dwf" is timed in fresh
+   interpreters with and without DWF_LAZY_BINDING.
+
+   Requires:
+       Linux, a C compiler (cc)
+
+   Usage:
+       python benchmarks/import_time.py [repeat]
+"""
+
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+TOP = os.path.dirname(HERE)
+
+def build_stub(workdir):
+    with open(os.path.join(TOP, "dwf", "lowlevel.py")) as f:
+        names = sorted(set(re.findall(r'_x?define\("(FDwf\w+)"', f.read())))
+    src = os.path.join(workdir, "stub.c")
+    with open(src, "w") as f:
+        for name in names:
+            f.write("int %s(void) { return 1; }\n" % name)
+    lib = os.path.join(workdir, "libdwf.so")
+    subprocess.check_call(["cc", "-shared", "-fPIC", "-o", lib, src])
+    return len(names)
+
+def measure(workdir, lazy, repeat):
+    env = dict(os.environ)
+    env["LD_LIBRARY_PATH"] = workdir
+    env["PYTHONPATH"] = TOP
+    env["DWF_LAZY_BINDING"] = "1" if lazy else "0"
+    code = ("import time; t = time.time(); import dwf; "
+            "dwf.FDwfGetVersion(); print(time.time() - t)")
+    results = []
+    for i in range(repeat):
+        out = subprocess.check_output([sys.executable, "-c", code], env=env)
+        results.append(float(out.decode().strip()))
+    return min(results), sum(results) / len(results)
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    workdir = tempfile.mkdtemp()
+    try:
+        count = build_stub(workdir)
+        print("stub library: %d symbols, %d runs each" % (count, repeat))
+        eager = measure(workdir, False, repeat)
+        lazy = measure(workdir, True, repeat)
+    finally:
+        shutil.rmtree(workdir)
+    print("eager: min %7.2f ms, mean %7.2f ms" % (eager[0]*1e3, eager[1]*1e3))
+    print("lazy:  min %7.2f ms, mean %7.2f ms" % (lazy[0]*1e3, lazy[1]*1e3))
+    print("speedup (min): %.1fx" % (eager[0] / lazy[0]))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+'''
+===========================================
+Digilent's DWF library wrapper for python.
+===========================================
+
+Background acquisition for record mode streams.
+
+A DwfAcquisitionThread iterates over a record stream
+(DwfAnalogIn.record() or DwfDigitalIn.record()) on a dedicated thread
+and writes the samples into a preallocated RingBuffer.  The consumer
+reads from the ring buffer, so a slow consumer does not stall the
+polling of the instrument.
+
+  record = dwf_ai.record(chunk=4096)
+  acq = DwfAcquisitionThread(record, 1 << 20, policy=DROP_OLDEST)
+  acq.start()
+  while True:
+      data = acq.read(8192, timeout=1.0)
+      ...
+  acq.stop()
+'''
+
+import threading
+import time
+
+from .api import _alloc_rows, _rows_view
+
+# backpressure policies, when the ring buffer is full
+BLOCK = 'block'              # the acquisition thread waits for consumer
+DROP_OLDEST = 'drop_oldest'  # the oldest samples are overwritten
+FAIL = 'fail'                # OverrunError is raised to the consumer
+
+class OverrunError(RuntimeError):
+    pass
+
+class RingBuffer(object):
+    '''Bounded ring buffer of rows x capacity samples of ctype.
+
+    overruns is the count of samples dropped (DROP_OLDEST) or
+    rejected (FAIL) by the ring buffer, separately from samples
+    lost by the device.'''
+    def __init__(self, rows, capacity, ctype, policy=BLOCK):
+        if policy not in (BLOCK, DROP_OLDEST, FAIL):
+            raise ValueError("unknown policy: %r" % (policy,))
+        self.rows = rows
+        self.capacity = capacity
+        self.ctype = ctype
+        self.policy = policy
+        self.overruns = 0
+        self.closed = False
+        self.error = None
+        self._buf = _alloc_rows(rows, capacity, ctype)
+        self._head = 0 # count of samples read
+        self._tail = 0 # count of samples written
+        self._cond = threading.Condition()
+
+    def __len__(self):
+        return self._tail - self._head
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+    def fail(self, error):
+        with self._cond:
+            self.error = error
+            self.closed = True
+            self._cond.notify_all()
+
+    def write(self, data):
+        '''write data[row][0:n] of every row'''
+        n = len(data[0])
+        pos = 0
+        with self._cond:
+            while pos < n and not self.closed:
+                free = self.capacity - len(self)
+                if self.policy == DROP_OLDEST:
+                    skip = n - pos - self.capacity
+                    if skip > 0:
+                        self.overruns += skip
+                        pos += skip
+                    drop = n - pos - free
+                    if drop > 0:
+                        self._head += drop
+                        self.overruns += drop
+                        free += drop
+                elif self.policy == FAIL and n - pos > free:
+                    self.overruns += n - pos - free
+                    raise OverrunError(
+                        "ring buffer overrun: %d samples" % (n - pos - free))
+                count = min(n - pos, free)
+                if count == 0:
+                    self._cond.wait()
+                    continue
+                self._copy_in(data, pos, count)
+                self._tail += count
+                pos += count
+                self._cond.notify_all()
+
+    def read(self, count=None, timeout=None, out=None):
+        '''Waits until count samples (any samples if count is None) are
+        available, and returns them as rows.  Fewer samples are returned
+        on timeout, or when the buffer is closed or full (count above
+        capacity).'''
+        if count is not None:
+            count = min(count, self.capacity)
+        deadline = None if timeout is None else time.time() + timeout
+        with self._cond:
+            while not self.closed:
+                available = len(self)
+                if available and (count is None or available >= count):
+                    break
+                if deadline is None:
+                    self._cond.wait()
+                else:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+            available = len(self)
+            if available == 0 and self.error is not None:
+                raise self.error
+            n = available if count is None else min(count, available)
+            if out is None:
+                out = _alloc_rows(self.rows, n, self.ctype)
+            self._copy_out(out, n)
+            self._head += n
+            self._cond.notify_all()
+            return _rows_view(out, 0, n)
+
+    def _copy_in(self, data, pos, count):
+        start = self._tail % self.capacity
+        first = min(count, self.capacity - start)
+        for i in range(self.rows):
+            self._buf[i][start:start + first] = data[i][pos:pos + first]
+            if count > first:
+                self._buf[i][:count - first] = data[i][pos + first:pos + count]
+    def _copy_out(self, out, count):
+        start = self._head % self.capacity
+        first = min(count, self.capacity - start)
+        for i in range(self.rows):
+            out[i][:first] = self._buf[i][start:start + first]
+            if count > first:
+                out[i][first:count] = self._buf[i][:count - first]
+
+class DwfAcquisitionThread(threading.Thread):
+    '''Runs a record stream on a dedicated thread into a RingBuffer.
+
+    lost and corrupted are counted by the device, overruns by the
+    ring buffer.'''
+    def __init__(self, record, capacity, policy=BLOCK):
+        threading.Thread.__init__(self)
+        self.daemon = True
+        self.record = record
+        self.ring = RingBuffer(record.rows, capacity, record.ctype, policy)
+        self._stopping = threading.Event()
+
+    @property
+    def lost(self):
+        return self.record.lost
+    @property
+    def corrupted(self):
+        return self.record.corrupted
+    @property
+    def overruns(self):
+        return self.ring.overruns
+
+    def run(self):
+        try:
+            for chunk in self.record:
+                if self._stopping.is_set():
+                    break
+                self.ring.write(self.record._rows_of(chunk))
+        except Exception as e:
+            self.ring.fail(e)
+        finally:
+            self.ring.close()
+
+    def stop(self, timeout=None):
+        self._stopping.set()
+        self.ring.close()
+        if self.is_alive():
+            self.join(timeout)
+
+    def read(self, count=None, timeout=None, out=None):
+        '''Returns samples in same shape as chunks of the record stream;
+        see RingBuffer.read()'''
+        rows = self.ring.read(count, timeout, out)
+        return self.record._view(rows, 0, len(rows[0]))
+
+    def __iter__(self):
+        '''yields everything in the ring buffer until the stream ends'''
+        while True:
+            data = self.read()
+            if len(self.record._rows_of(data)[0]) == 0:
+                break
+            yield data
@@ -0,0 +1,87 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+'''
+===========================================
+Digilent's DWF library wrapper for python.
+===========================================
+
+asyncio support (Python 3.5 or above).
+
+Library calls for a device are run on a single-thread executor which
+belongs to the device handle, so calls for one device are serialized
+and several devices run in parallel.  Waiting between status polls is
+done by asyncio.sleep(), and does not occupy the executor thread.
+
+These coroutines are usually called through the instrument classes:
+
+  data = await dwf_ai.acquire()
+  async for chunk in dwf_ai.arecord(chunk=4096):
+      ...
+  await dwf_ao.wait_done(0)
+'''
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+def executor(instrument):
+    '''Returns the executor of the device handle of instrument'''
+    hdwf = instrument.hdwf
+    if hdwf.executor is None:
+        hdwf.executor = ThreadPoolExecutor(max_workers=1)
+    return hdwf.executor
+
+async def run(instrument, func, *args):
+    '''Calls func(*args) on the executor of instrument'''
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(
+        executor(instrument), functools.partial(func, *args))
+
+async def wait_state(instrument, status, args=(), state=None,
+                     poll_interval=0.001):
+    '''Polls status(*args) until it returns state (DONE by default)'''
+    if state is None:
+        state = instrument.STATE.DONE
+    while True:
+        sts = await run(instrument, status, *args)
+        if sts == state:
+            return sts
+        await asyncio.sleep(poll_interval)
+
+def _read_acquisition(instrument, channels):
+    count = instrument.statusSamplesValid()
+    if not hasattr(instrument, 'statusDataAll'):
+        return instrument.statusData(count)
+    return instrument.statusDataAll(count, channels=channels)
+
+async def acquire(instrument, channels=None, start=True, poll_interval=0.001):
+    '''Single acquisition of DwfAnalogIn or DwfDigitalIn; returns
+    samples as DwfAnalogIn.record() or DwfDigitalIn.record() chunks'''
+    if start:
+        await run(instrument, instrument.configure, False, True)
+    await wait_state(instrument, instrument.status, (True,),
+                     poll_interval=poll_interval)
+    return await run(instrument, _read_acquisition, instrument, channels)
+
+_END = object()
+
+class AsyncRecord(object):
+    '''Asynchronous iterator over a record stream; one poll of the
+    record stream is run on the executor per step.  Counters (lost,
+    corrupted, samples) are those of the record stream.'''
+    def __init__(self, record):
+        self.record = record
+        self._steps = record._steps()
+    def __getattr__(self, name):
+        return getattr(self.record, name)
+    def __aiter__(self):
+        return self
+    async def __anext__(self):
+        while True:
+            chunk = await run(self.record.instrument, next, self._steps, _END)
+            if chunk is _END:
+                raise StopAsyncIteration
+            if chunk is not None:
+                return chunk
+            await asyncio.sleep(self.record._delay)
@@ -24,6 +24,12 @@ Supported platforms
 This code is tested with Waveforms SDK, October 12, 2015 version.
 '''
 
+import json
+import os
+import threading
+import time
+from collections import namedtuple
+from ctypes import c_double, c_ubyte, c_uint16, c_uint32
 from enum import IntEnum
 
 from . import lowlevel as _l
@@ -39,6 +45,19 @@ def _make_set(value, enum):
             result.append(e)
     return frozenset(result)
 
+# sample buffers: numpy.ndarray of shape (rows, size) with numpy,
+# otherwise list of memoryview; buf[row][start:stop] is a view for both
+def _alloc_rows(rows, size, ctype):
+    np = _l._numpy()
+    if np is not None:
+        return np.zeros((rows, size), dtype=ctype)
+    return [ _l._as_array((ctype * size)()) for i in range(rows) ]
+
+def _rows_view(buf, start, stop):
+    if _l._numpy() is not None:
+        return buf[:, start:stop]
+    return tuple([ row[start:stop] for row in buf ])
+
 # DEVICE MANAGMENT FUNCTIONS
 # Enumeration:
 class ENUMFILTER(IntEnum):
@@ -96,13 +115,463 @@ class DwfDevice(object):
     def open(self, config=None):
         return Dwf(self.idxDevice, idxCfg=config)
 
+def _enum_or_int(enum, value):
+    # devices newer than the enum are reported by number
+    try:
+        return enum(value)
+    except ValueError:
+        return value
+
+def _normalize_sn(sn):
+    return sn[3:] if sn.startswith('SN:') else sn
+
+# configs: tuple of { DwfDevice.CONFIGINFO: value } of each config
+DwfDeviceEntry = namedtuple(
+    'DwfDeviceEntry',
+    'idxDevice devid devver deviceName userName SN opened configs')
+
+class DwfEnumSnapshot(object):
+    '''Table of the enumerated devices, collected in one pass.
+
+    Entries are looked up by serial number (with or without 'SN:') or
+    user name in O(1).  The table is enumerated again when it is older
+    than ttl seconds, at the next access.
+
+      devices = DwfEnumSnapshot(ttl=5.0)
+      entry = devices.bySN('210321A1B2C3')
+      dwf_ai = devices.open('210321A1B2C3', cls=DwfAnalogIn)
+    '''
+    def __init__(self, enumfilter=ENUMFILTER.ALL, ttl=1.0):
+        self.enumfilter = enumfilter
+        self.ttl = ttl
+        self.enumerations = 0
+        self._lock = threading.Lock()
+        self._time = None
+        self._table = ((), {}, {})
+
+    def refresh(self, force=False):
+        '''Enumerates again if the table is older than ttl, or force;
+        returns True if enumerated'''
+        if not force and self._fresh():
+            return False
+        with self._lock:
+            if not force and self._fresh():
+                return False # by another thread
+            entries = []
+            for idx in range(_l.FDwfEnum(self.enumfilter)):
+                devid, devver = _l.FDwfEnumDeviceType(idx)
+                configs = []
+                for idxCfg in range(_l.FDwfEnumConfig(idx)):
+                    configs.append(dict([
+                        (info, _l.FDwfEnumConfigInfo(idxCfg, info))
+                        for info in DwfDevice.CONFIGINFO ]))
+                entries.append(DwfDeviceEntry(
+                    idx, _enum_or_int(DwfDevice.DEVID, devid),
+                    _enum_or_int(DwfDevice.DEVVER, devver),
+                    _l.FDwfEnumDeviceName(idx), _l.FDwfEnumUserName(idx),
+                    _l.FDwfEnumSN(idx),
+                    bool(_l.FDwfEnumDeviceIsOpened(idx)), tuple(configs)))
+            by_sn = dict([ (_normalize_sn(e.SN), e) for e in entries ])
+            by_name = dict([ (e.userName, e) for e in entries ])
+            self._table = (tuple(entries), by_sn, by_name)
+            self._time = time.time()
+            self.enumerations += 1
+            return True
+
+    def _fresh(self):
+        return self._time is not None and time.time() - self._time < self.ttl
+
+    def entries(self):
+        '''Returns DwfDeviceEntry of all devices'''
+        self.refresh()
+        return self._table[0]
+
+    def __len__(self):
+        return len(self.entries())
+    def __iter__(self):
+        return iter(self.entries())
+
+    def bySN(self, sn):
+        '''Returns DwfDeviceEntry of serial number sn, None if not found'''
+        self.refresh()
+        return self._table[1].get(_normalize_sn(sn))
+
+    def byUserName(self, name):
+        '''Returns DwfDeviceEntry of user name, None if not found'''
+        self.refresh()
+        return self._table[2].get(name)
+
+    def open(self, sn, idxCfg=None, cls=None):
+        '''Opens the device of serial number sn as cls (default: Dwf);
+        devices are enumerated again, since indices of the table are
+        those of the last enumeration'''
+        self.refresh(force=True)
+        entry = self.bySN(sn)
+        if entry is None:
+            raise RuntimeError("Device %s is not found" % sn)
+        return (cls or Dwf)(entry.idxDevice, idxCfg)
+
+class DwfShadow(object):
+    '''Write-through shadow of settings of a device handle.
+
+    A Set of the value which was set last, or which a Get returned
+    (the value after coercion by the device), is skipped.  A Get is
+    served from the shadow after the first one; a Set which is sent
+    drops the Gets of its instrument, since the device may coerce
+    settings by each other.  Resets and autoConfigureSet() invalidate
+    the shadow; call invalidate() after changing settings otherwise.'''
+    def __init__(self):
+        self.hits = 0     # Gets served from the shadow
+        self.misses = 0   # Gets sent to the device
+        self.skipped = 0  # Sets skipped
+        self.written = 0  # Sets sent to the device
+        self._requested = {}
+        self._values = {}
+
+    def invalidate(self, instrument=None):
+        '''Forgets settings of instrument (class name), or of all'''
+        if instrument is None:
+            self._requested.clear()
+            self._values.clear()
+            return
+        for table in (self._requested, self._values):
+            for key in [ k for k in table if k[0] == instrument ]:
+                del table[key]
+
+    def _skip(self, key, value):
+        for table in (self._requested, self._values):
+            if key in table and table[key] == value:
+                self.skipped += 1
+                return True
+        return False
+
+    def _write(self, key, value):
+        self.written += 1
+        _forget(self._requested, key)
+        for k in [ k for k in self._values if k[0] == key[0] ]:
+            del self._values[k]
+        self._requested[key] = value
+
+    def metrics(self):
+        return { 'hits': self.hits,
+                 'misses': self.misses,
+                 'skipped': self.skipped,
+                 'written': self.written }
+
+def _forget(table, key):
+    # drops settings of (instrument, name, index...) which key overlaps;
+    # index -1 means all channels
+    for k in list(table):
+        if k[:2] == key[:2] and (-1 in key[2:] or -1 in k[2:]):
+            del table[k]
+
+class DwfConfig(object):
+    '''Declarative settings of an instrument, for apply() of it.
+
+    Keywords are names of xxxSet() methods of the instrument.  Settings
+    of channels take a dict of { idxChannel: value } ({ (idxChannel,
+    node): value } for nodes of DwfAnalogOut), and settings of several
+    values take a tuple.  Settings which are not given are not changed.
+    DwfConfig is immutable and hashable.
+
+      cfg = DwfConfig(frequency=20e6, bufferSize=8192,
+                      channelEnable={ 0: True }, channelRange={ 0: 5.0 },
+                      triggerSource=dwf_ai.TRIGSRC.DETECTOR_ANALOG_IN,
+                      triggerLevel=1.5)
+      dwf_ai.apply(cfg)
+      dwf_ai.apply(cfg.replace(triggerLevel=0.5)) # only triggerLevelSet
+    '''
+    def __init__(self, **settings):
+        self._settings = {}
+        for name, value in settings.items():
+            if isinstance(value, dict):
+                for index, v in value.items():
+                    if not isinstance(index, tuple):
+                        index = (index,)
+                    self._settings[(name,) + index] = v
+            else:
+                self._settings[(name,)] = value
+        self._hash = None
+
+    def replace(self, **settings):
+        '''Returns a copy with settings changed'''
+        cfg = DwfConfig(**settings)
+        merged = dict(self._settings)
+        merged.update(cfg._settings)
+        cfg._settings = merged
+        return cfg
+
+    def items(self):
+        '''Returns ((name, index...), value) of settings'''
+        return self._settings.items()
+
+    def __eq__(self, other):
+        return (isinstance(other, DwfConfig) and
+                self._settings == other._settings)
+    def __ne__(self, other):
+        return not self == other
+    def __hash__(self):
+        if self._hash is None:
+            self._hash = hash(frozenset(self._settings.items()))
+        return self._hash
+    def __repr__(self):
+        settings = {}
+        for key, value in self._settings.items():
+            if len(key) == 1:
+                settings[key[0]] = value
+            else:
+                index = key[1] if len(key) == 2 else key[1:]
+                settings.setdefault(key[0], {})[index] = value
+        return 'DwfConfig(%s)' % ', '.join(
+            [ '%s=%r' % item for item in sorted(settings.items()) ])
+
+def _bind(method, args, kwargs):
+    # arguments of a call of method (without self) as positional ones,
+    # with keywords and defaults bound
+    code = method.__code__
+    names = code.co_varnames[1:code.co_argcount]
+    if not kwargs and len(args) == len(names):
+        return args
+    defaults = method.__defaults__ or ()
+    first = len(names) - len(defaults) # first argument with default
+    kwargs = dict(kwargs)
+    bound = list(args)
+    for i in range(len(args), len(names)):
+        if names[i] in kwargs:
+            bound.append(kwargs.pop(names[i]))
+        elif i >= first:
+            bound.append(defaults[i - first])
+        else:
+            raise TypeError("%s() missing argument: %s" %
+                            (method.__name__, names[i]))
+    if kwargs:
+        raise TypeError("%s() got unexpected arguments: %s" %
+                        (method.__name__, ', '.join(sorted(kwargs))))
+    return tuple(bound)
+
+def _shadow_set(instrument, name, nkeys, method):
+    def set_(self, *args, **kwargs):
+        hdwf = self.hdwf
+        shadow = hdwf.shadow
+        if shadow is None and not hdwf.applied:
+            return method(self, *args, **kwargs)
+        args = _bind(method, args, kwargs)
+        key = (instrument, name) + args[:nkeys]
+        # apply() sets it again
+        hdwf.applied.pop(key, None)
+        _forget(hdwf.applied, key)
+        if shadow is None:
+            return method(self, *args)
+        value = args[nkeys] if len(args) == nkeys + 1 else args[nkeys:]
+        if not shadow._skip(key, value):
+            method(self, *args)
+            shadow._write(key, value)
+    return set_
+
+def _shadow_get(instrument, name, nkeys, method):
+    def get(self, *args, **kwargs):
+        shadow = self.hdwf.shadow
+        if shadow is None:
+            return method(self, *args, **kwargs)
+        args = _bind(method, args, kwargs)
+        key = (instrument, name) + args[:nkeys]
+        if key in shadow._values:
+            shadow.hits += 1
+            return shadow._values[key]
+        shadow.misses += 1
+        value = shadow._values[key] = method(self, *args)
+        return value
+    return get
+
+def _shadow_methods(cls):
+    # wraps xxxSet/xxxGet of cls._SETTINGS
+    for name, nkeys in cls._SETTINGS:
+        for suffix, wrap in (('Set', _shadow_set), ('Get', _shadow_get)):
+            method = getattr(cls, name + suffix)
+            wrapped = wrap(cls.__name__, name, nkeys, method)
+            wrapped.__name__ = method.__name__
+            wrapped.__doc__ = method.__doc__
+            setattr(cls, name + suffix, wrapped)
+
+class DwfCapabilities(object):
+    '''Memo of constant queries (mostly *Info()) of a device handle.
+
+    save() and load() persist the memo in a JSON file, under the
+    identity of the device: serial number, device type and revision,
+    configuration and library version.  Loaded values are served
+    without queries to the device.'''
+    def __init__(self, idxDevice=None, idxCfg=None):
+        self.hits = 0
+        self.misses = 0
+        self._idxDevice = idxDevice
+        self._idxCfg = idxCfg
+        self._identity = None
+        self._values = {}
+
+    def _index(self):
+        # enumeration index of the device, None if unknown
+        idx = self._idxDevice
+        if idx is not None and idx < 0:
+            opened = [ i for i in range(_l.FDwfEnum(_l.enumfilterAll))
+                       if _l.FDwfEnumDeviceIsOpened(i) ]
+            idx = opened[0] if len(opened) == 1 else None
+        return idx
+
+    def serial(self):
+        '''Returns the serial number of the device, or None if unknown'''
+        idx = self._index()
+        return None if idx is None else _l.FDwfEnumSN(idx)
+
+    def identity(self):
+        '''Returns "SN/devid/devver/config/version", or None if unknown
+        (opened by idxDevice -1 with several devices open)'''
+        if self._identity is None:
+            idx = self._index()
+            if idx is None:
+                return None
+            devid, devver = _l.FDwfEnumDeviceType(idx)
+            config = 'default' if self._idxCfg is None else self._idxCfg
+            self._identity = '%s/%s/%s/%s/%s' % (
+                _l.FDwfEnumSN(idx), int(devid), int(devver), config,
+                _l.FDwfGetVersion())
+        return self._identity
+
+    def _read(self, path):
+        try:
+            f = open(path)
+        except IOError:
+            return {}
+        try:
+            return json.load(f).get('devices', {})
+        finally:
+            f.close()
+
+    def load(self, path):
+        '''Loads values of this device from path; returns the count'''
+        identity = self.identity()
+        count = 0
+        for key, value in self._read(path).get(identity, ()):
+            key = tuple(_decode_value(k) for k in key)
+            if key[1] in _CAPABILITIES:
+                self._values[key] = _decode_value(value)
+                count += 1
+        return count
+
+    def save(self, path):
+        '''Saves values of this device to path, keeping other devices'''
+        identity = self.identity()
+        if identity is None:
+            raise RuntimeError("the device is not known")
+        devices = self._read(path)
+        devices[identity] = [ [ [ _encode_value(k) for k in key ],
+                                _encode_value(value) ]
+                              for key, value in self._values.items() ]
+        tmp = path + '.tmp'
+        f = open(tmp, 'w')
+        try:
+            json.dump({ 'format': 1, 'devices': devices }, f)
+        finally:
+            f.close()
+        getattr(os, 'replace', os.rename)(tmp, path)
+
+    def metrics(self):
+        return { 'hits': self.hits,
+                 'misses': self.misses,
+                 'entries': len(self._values) }
+
+_ENUMS = {}
+
+def _enums():
+    # { name: enum class } and { enum class: name } of enums of classes
+    if not _ENUMS:
+        for cls in (Dwf, DwfDevice, DwfAnalogIn, DwfAnalogOut, DwfAnalogIO,
+                    DwfDigitalIn, DwfDigitalOut):
+            for name, value in vars(cls).items():
+                if isinstance(value, type) and issubclass(value, IntEnum):
+                    name = '%s.%s' % (cls.__name__, name)
+                    _ENUMS[name] = value
+                    _ENUMS[value] = name
+    return _ENUMS
+
+def _encode_value(value):
+    if isinstance(value, IntEnum):
+        return { 'enum': _enums()[type(value)], 'value': int(value) }
+    if isinstance(value, frozenset):
+        return { 'set': [ _encode_value(v) for v in value ] }
+    if isinstance(value, tuple):
+        return { 'tuple': [ _encode_value(v) for v in value ] }
+    if isinstance(value, list):
+        return [ _encode_value(v) for v in value ]
+    return value
+
+def _decode_value(value):
+    if isinstance(value, dict):
+        if 'enum' in value:
+            return _enums()[value['enum']](value['value'])
+        if 'set' in value:
+            return frozenset([ _decode_value(v) for v in value['set'] ])
+        return tuple([ _decode_value(v) for v in value['tuple'] ])
+    if isinstance(value, list):
+        return [ _decode_value(v) for v in value ]
+    return value
+
+def _capability(instrument, name, method):
+    def info(self, *args, **kwargs):
+        capabilities = self.hdwf.capabilities
+        args = _bind(method, args, kwargs)
+        key = (instrument, name) + args
+        if key in capabilities._values:
+            capabilities.hits += 1
+            return capabilities._values[key]
+        capabilities.misses += 1
+        value = capabilities._values[key] = method(self, *args)
+        return value
+    return info
+
+# queries of constants of the device; other *Info() depend on settings
+# (as triggerPositionInfo on frequency and buffer size) and are not kept
+_CAPABILITIES = frozenset([
+    'channelCount', 'channelRangeSteps', 'channelName', 'channelNodeName',
+    # Dwf, DwfAnalogIn
+    'triggerInfo', 'frequencyInfo', 'bitsInfo', 'bufferSizeInfo',
+    'acquisitionModeInfo', 'channelFilterInfo', 'channelRangeInfo',
+    'triggerSourceInfo', 'triggerTypeInfo', 'triggerChannelInfo',
+    'triggerFilterInfo', 'triggerConditionInfo',
+    'triggerLengthConditionInfo',
+    # DwfAnalogOut
+    'idleInfo', 'nodeInfo', 'nodeFunctionInfo', 'nodeFrequencyInfo',
+    'nodeAmplitudeInfo', 'nodeModulationInfo', 'nodeOffsetInfo',
+    'nodeSymmetryInfo', 'nodePhaseInfo',
+    # DwfAnalogIO, DwfDigitalIO
+    'enableInfo', 'channelInfo', 'channelNodeInfo', 'channelNodeSetInfo',
+    'channelNodeStatusInfo', 'outputEnableInfo', 'outputInfo', 'inputInfo',
+    # DwfDigitalIn, DwfDigitalOut
+    'internalClockInfo', 'clockSourceInfo', 'dividerInfo',
+    'sampleModeInfo', 'typeInfo', 'counterInfo', 'dataInfo',
+    ])
+
+def _capability_methods(cls):
+    for name, method in list(vars(cls).items()):
+        if callable(method) and name in _CAPABILITIES:
+            wrapped = _capability(cls.__name__, name, method)
+            wrapped.__name__ = method.__name__
+            wrapped.__doc__ = method.__doc__
+            setattr(cls, name, wrapped)
+
 class _HDwf(object):
-    def __init__(self, hdwf):
+    executor = None # for dwf.aio
+    shadow = None # DwfShadow
+    def __init__(self, hdwf, idxDevice=None, idxCfg=None):
         self.hdwf = hdwf
+        self.capabilities = DwfCapabilities(idxDevice, idxCfg)
+        self.applied = {} # settings by apply()
     @property
     def _as_parameter_(self):
         return self.hdwf
     def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+            self.executor = None
         if self.hdwf != _l.hdwfNone:
             _l.FDwfDeviceClose(self.hdwf)
             self.hdwf = _l.hdwfNone
@@ -152,14 +621,16 @@ class Dwf(object):
             hdwf = _l.FDwfDeviceConfigOpen(idxDevice, idxCfg)
         if hdwf == self.DEVICE_NONE:
             raise RuntimeError("Device is not found")
-        self.hdwf = _HDwf(hdwf)
+        self.hdwf = _HDwf(hdwf, idxDevice, idxCfg)
     def close(self):
         self.hdwf.close()
     def autoConfigureSet(self, auto_configure):
+        self._invalidate(None)
         _l.FDwfDeviceAutoConfigureSet(self.hdwf, auto_configure)
     def autoConfigureGet(self):
         return bool(_l.FDwfDeviceAutoConfigureGet(self.hdwf))
     def reset(self):
+        self._invalidate(None)
         _l.FDwfDeviceReset(self.hdwf)
     def enableSet(self, enable):
         _l.FDwfDeviceEnableSet(self.hdwf, enable)
@@ -172,6 +643,264 @@ class Dwf(object):
     def triggerPC(self):
         _l.FDwfDeviceTriggerPC(self.hdwf)
 
+    def shadowSet(self, enable):
+        '''Enables the write-through shadow of settings of this device
+        handle, shared by instruments on it (see DwfShadow)'''
+        if not enable:
+            self.hdwf.shadow = None
+        elif self.hdwf.shadow is None:
+            self.hdwf.shadow = DwfShadow()
+    def shadowGet(self):
+        '''Returns DwfShadow, or None if disabled'''
+        return self.hdwf.shadow
+    def capabilitiesGet(self):
+        '''Returns DwfCapabilities of this device handle'''
+        return self.hdwf.capabilities
+    def _invalidate(self, instrument):
+        applied = self.hdwf.applied
+        for key in [ k for k in applied
+                     if instrument is None or k[0] == instrument ]:
+            del applied[key]
+        if self.hdwf.shadow is not None:
+            self.hdwf.shadow.invalidate(instrument)
+
+    def _apply(self, cfg):
+        # sets settings of cfg which differ from the last apply(), in
+        # the order of _SETTINGS; returns the count of them
+        instrument = type(self).__name__
+        order = dict([ (setting[0], i)
+                       for i, setting in enumerate(self._SETTINGS) ])
+        nkeys = dict(self._SETTINGS)
+        applied = self.hdwf.applied
+        groups = {}
+        for key, value in cfg.items():
+            name = key[0]
+            if name not in order:
+                raise ValueError("%s has no setting %s" % (instrument, name))
+            if len(key) - 1 != nkeys[name]:
+                raise ValueError("%s takes %d indices" % (name, nkeys[name]))
+            groups.setdefault(name, {})[(instrument,) + key] = value
+        changed = []
+        replaced = set()
+        for name, group in groups.items():
+            if [ key for key in group if -1 in key[2:] ]:
+                # index -1 and indices after it are set as a whole
+                current = dict([ (k, v) for k, v in applied.items()
+                                 if k[:2] == (instrument, name) ])
+                if current != group:
+                    for key in current:
+                        del applied[key]
+                    changed.extend(group.items())
+                    replaced.add(name)
+            else:
+                changed.extend([ (key, value) for key, value in group.items()
+                                 if key not in applied or
+                                 applied[key] != value ])
+        changed.sort(key=lambda item: (order[item[0][1]], item[0][2:]))
+        for key, value in changed:
+            values = value if isinstance(value, tuple) else (value,)
+            getattr(self, key[1] + 'Set')(*(key[2:] + values))
+        # recorded after all sets, which drop the entries they overlap
+        for key, value in changed:
+            if key[1] not in replaced:
+                _forget(applied, key)
+            applied[key] = value
+        return len(changed)
+
+    def arun(self, func, *args):
+        '''Coroutine: calls func(*args) on the executor of this device'''
+        from . import aio
+        return aio.run(self, func, *args)
+
+class DwfPollScheduler(object):
+    '''Decides the interval of status polls instead of a fixed sleep.
+
+    While the instrument waits for the trigger, the interval grows
+    exponentially from min_interval to max_interval.  When the count of
+    samples to wait for is known (statusSamplesLeft, or samples of a
+    record chunk), it sleeps margin times the time to acquire them.
+    polls and wasted_polls (polls which found nothing new) are counted
+    over all acquisitions.'''
+    def __init__(self, min_interval=0.0002, max_interval=0.05,
+                 backoff=2.0, margin=0.9):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff_factor = backoff
+        self.margin = margin
+        self.acquisitions = 0
+        self.polls = 0
+        self.wasted_polls = 0
+        self._interval = min_interval
+    def begin(self):
+        '''called at start of each acquisition'''
+        self.acquisitions += 1
+        self._interval = self.min_interval
+    def poll(self, useful):
+        self.polls += 1
+        if not useful:
+            self.wasted_polls += 1
+    def backoff(self):
+        '''interval while waiting for an unpredictable event'''
+        interval = self._interval
+        self._interval = min(interval * self.backoff_factor,
+                             self.max_interval)
+        return interval
+    def until(self, samples, hzFrequency):
+        '''interval to wait for samples at hzFrequency'''
+        self._interval = self.min_interval
+        interval = self.margin * samples / hzFrequency
+        return max(self.min_interval, min(interval, self.max_interval))
+    def polls_per_acquisition(self):
+        return float(self.polls) / max(self.acquisitions, 1)
+    def metrics(self):
+        return { 'acquisitions': self.acquisitions,
+                 'polls': self.polls,
+                 'wasted_polls': self.wasted_polls,
+                 'polls_per_acquisition': self.polls_per_acquisition() }
+
+def _status_wait(instrument, hzFrequency, scheduler, poll_interval):
+    # polls status(True) until DONE
+    STATE = instrument.STATE
+    if scheduler is not None:
+        scheduler.begin()
+        hzFrequency = hzFrequency()
+    while True:
+        sts = instrument.status(True)
+        if scheduler is not None:
+            scheduler.poll(sts == STATE.DONE)
+        if sts == STATE.DONE:
+            return sts
+        if scheduler is None:
+            delay = poll_interval
+        elif sts == STATE.TRIGGERED:
+            delay = scheduler.until(instrument.statusSamplesLeft(), hzFrequency)
+        else:
+            delay = scheduler.backoff()
+        time.sleep(delay)
+
+class _DwfRecord(object):
+    '''Record mode stream; iterate over it to get chunks of samples.
+
+    Chunks are views of a buffer which is reused for the next chunk,
+    copy them to keep.  lost, corrupted and samples (count of yielded
+    samples) are updated while iterating.  With a DwfPollScheduler,
+    intervals of polls are predicted from the sample rate.'''
+    def __init__(self, instrument, rows, ctype,
+                 chunk, limit, poll_interval, start, scheduler=None):
+        self.instrument = instrument
+        self.rows = rows
+        self.ctype = ctype
+        self.chunk = chunk
+        self.limit = limit
+        self.poll_interval = poll_interval
+        self.start = start
+        self.scheduler = scheduler
+        self.samples = 0
+        self.lost = 0
+        self.corrupted = 0
+        self._delay = poll_interval
+    def _trigger(self):
+        # sample index of the trigger, -1 if unknown (without a limit)
+        instrument = self.instrument
+        if self.limit is None or \
+           instrument.triggerSourceGet() == instrument.TRIGSRC.NONE:
+            return -1
+        index = self.limit - self._after_trigger()
+        return index if 0 <= index <= self.limit else -1
+    def __iter__(self):
+        for chunk in self._steps():
+            if chunk is None:
+                time.sleep(self._delay)
+            else:
+                yield chunk
+
+    def _view(self, buf, start, stop):
+        return _rows_view(buf, start, stop)
+    def _rows_of(self, chunk):
+        return chunk
+    def _polled(self, useful, samples=None):
+        # sets the delay until the next poll
+        scheduler = self.scheduler
+        if scheduler is None:
+            self._delay = self.poll_interval
+            return
+        scheduler.poll(useful)
+        if samples is None:
+            self._delay = scheduler.backoff()
+        else:
+            self._delay = scheduler.until(samples, self._hzFrequency)
+    def _steps(self):
+        # one poll per step; yields a chunk, or None to wait self._delay
+        instrument = self.instrument
+        STATE = instrument.STATE
+        chunk, limit = self.chunk, self.limit
+        bufsize = instrument.bufferSizeGet()
+        capacity = (chunk or 0) + bufsize
+        buf = _alloc_rows(self.rows, capacity, self.ctype)
+        fill = position = 0
+        started = False
+        if self.scheduler is not None:
+            self.scheduler.begin()
+            self._hzFrequency = self._frequency()
+        def wanted():
+            # wait for a chunk, but not more than half of the device buffer
+            return min((chunk or bufsize) - fill, bufsize // 2) or 1
+        if self.start:
+            instrument.configure(False, True)
+        while limit is None or position < limit:
+            sts = instrument.status(True)
+            if not started:
+                if sts in (STATE.CONFIG, STATE.PREFILL, STATE.ARMED):
+                    # acquisition not yet started
+                    self._polled(False)
+                    yield None
+                    continue
+                started = True
+            available, lost, corrupted = instrument.statusRecord()
+            self.lost += lost
+            self.corrupted += corrupted
+            position += lost
+            if limit is not None:
+                available = min(available, limit - position)
+            if available <= 0:
+                self._polled(sts == STATE.DONE, wanted())
+                if sts == STATE.DONE or (limit is not None and
+                                         position >= limit):
+                    break
+                yield None
+                continue
+            self._polled(True)
+            if fill + available > capacity:
+                capacity = fill + available
+                new = _alloc_rows(self.rows, capacity, self.ctype)
+                for i in range(self.rows):
+                    new[i][:fill] = buf[i][:fill]
+                buf = new
+            self._read(buf, fill, available)
+            fill += available
+            position += available
+            if chunk is None:
+                self.samples += fill
+                yield self._view(buf, 0, fill)
+                fill = 0
+            else:
+                start = 0
+                while fill - start >= chunk:
+                    self.samples += chunk
+                    yield self._view(buf, start, start + chunk)
+                    start += chunk
+                if start:
+                    for row in buf:
+                        row[:fill - start] = row[start:fill]
+                    fill -= start
+            if self.scheduler is not None and sts != STATE.DONE:
+                self._delay = self.scheduler.until(
+                    wanted(), self._hzFrequency)
+                yield None
+        if fill:
+            self.samples += fill
+            yield self._view(buf, 0, fill)
+
 # ANALOG IN INSTRUMENT FUNCTIONS
 class DwfAnalogIn(Dwf):
     class ACQMODE(IntEnum):
@@ -203,6 +932,18 @@ class DwfAnalogIn(Dwf):
         LESS = _l.triglenLess
         TIMEOUT = _l.triglenTimeout
         MORE = _l.triglenMore
+
+    # settings in dependency order: (name, count of index arguments)
+    _SETTINGS = (
+        ('acquisitionMode', 0), ('frequency', 0), ('bufferSize', 0),
+        ('recordLength', 0), ('channelEnable', 1), ('channelFilter', 1),
+        ('channelAttenuation', 1), ('channelRange', 1), ('channelOffset', 1),
+        ('triggerSource', 0), ('triggerType', 0), ('triggerChannel', 0),
+        ('triggerFilter', 0), ('triggerCondition', 0), ('triggerLevel', 0),
+        ('triggerHysteresis', 0), ('triggerLengthCondition', 0),
+        ('triggerLength', 0), ('triggerPosition', 0),
+        ('triggerAutoTimeout', 0), ('triggerHoldOff', 0),
+        )
     
 # Control and status:
     def __init__(self, idxDevice=-1, idxCfg=None):
@@ -212,9 +953,17 @@ class DwfAnalogIn(Dwf):
             super(DwfAnalogIn, self).__init__(idxDevice, idxCfg)
     def reset(self, parent=False):
         if parent: super(DwfAnalogIn, self).reset()
+        self._invalidate('DwfAnalogIn')
         _l.FDwfAnalogInReset(self.hdwf)
     def configure(self, reconfigure, start):
         _l.FDwfAnalogInConfigure(self.hdwf, reconfigure, start)
+    def apply(self, cfg, start=False):
+        '''Sets settings of DwfConfig cfg which differ from the last
+        apply(), then configures once; returns the count of Sets'''
+        count = self._apply(cfg)
+        if count or start:
+            self.configure(True, start)
+        return count
     def status(self, read_data):
         return self.STATE(_l.FDwfAnalogInStatus(self.hdwf, read_data))
     def statusSamplesLeft(self):
@@ -225,18 +974,107 @@ class DwfAnalogIn(Dwf):
         return _l.FDwfAnalogInStatusIndexWrite(self.hdwf)
     def statusAutotriggered(self):
         return bool(_l.FDwfAnalogInStatusAutoTriggered(self.hdwf))
-    def statusData(self, idxChannel, data_num):
-        return _l.FDwfAnalogInStatusData(self.hdwf, idxChannel, data_num)
+    def statusData(self, idxChannel, data_num=None, out=None, as_array=False):
+        '''out: buffer to fill in place, as_array: return ndarray/memoryview'''
+        return _l.FDwfAnalogInStatusData(
+            self.hdwf, idxChannel, data_num, out=out, as_array=as_array)
+    def statusData2(self, idxChannel, idxData, data_num, out=None,
+                    as_array=False):
+        '''Reads data_num samples from idxData (not in older libraries)'''
+        return _l.FDwfAnalogInStatusData2(
+            self.hdwf, idxChannel, idxData, data_num, out=out,
+            as_array=as_array)
+    def statusDataAll(self, data_num=None, out=None, channels=None):
+        '''Reads channels (default: enabled channels) into out, or a new
+        array of shape (channels, data_num); default data_num is
+        statusSamplesValid()'''
+        if channels is None:
+            channels = self.channelEnabled()
+        if data_num is None:
+            data_num = self.statusSamplesValid()
+        if out is None:
+            out = _alloc_rows(len(channels), data_num, c_double)
+        for i, idxChannel in enumerate(channels):
+            _l.FDwfAnalogInStatusData(
+                self.hdwf, idxChannel, data_num, out=out[i])
+        return out
     def statusNoise(self, idxChannel, data_num):
         return _l.FDwfAnalogInStatusNoise(self.hdwf, idxChannel, data_num)
+    def statusNoiseAll(self, data_num=None, out=None, channels=None):
+        '''Same as statusDataAll() for the pair of noise (min, max)'''
+        if channels is None:
+            channels = self.channelEnabled()
+        if data_num is None:
+            data_num = self.noiseSizeGet()
+        if out is None:
+            out = (_alloc_rows(len(channels), data_num, c_double),
+                   _alloc_rows(len(channels), data_num, c_double))
+        for i, idxChannel in enumerate(channels):
+            _l.FDwfAnalogInStatusNoise(self.hdwf, idxChannel, data_num,
+                                       out=(out[0][i], out[1][i]))
+        return out
     def statusSample(self, idxChannel):
         return _l.FDwfAnalogInStatusSample(self.hdwf, idxChannel)
     def statusRecord(self):
         return _l.FDwfAnalogInStatusRecord(self.hdwf)
+    def statusWait(self, scheduler=None, poll_interval=0.001):
+        '''Polls status(True) until DONE, by scheduler or poll_interval'''
+        return _status_wait(self, self.frequencyGet, scheduler, poll_interval)
     def recordLengthSet(self, length):
         _l.FDwfAnalogInRecordLengthSet(self.hdwf, length)
     def recordLengthGet(self):
         return _l.FDwfAnalogInRecordLengthGet(self.hdwf)
+    def record(self, chunk=None, samples=None, duration=None, channels=None,
+               poll_interval=0.001, start=True, scheduler=None):
+        '''Returns DwfAnalogInRecord which yields arrays of shape
+        (channels, n) in acqmodeRecord.  n is chunk, or all available
+        samples if chunk is None.  Stops after samples, or duration
+        seconds of samples, or when the acquisition is done.'''
+        if channels is None:
+            channels = self.channelEnabled()
+        if duration is not None:
+            samples = int(round(duration * self.frequencyGet()))
+        return DwfAnalogInRecord(
+            self, channels, chunk, samples, poll_interval, start, scheduler)
+    def arecord(self, *args, **kwargs):
+        '''Asynchronous iterator version of record()'''
+        from . import aio
+        return aio.AsyncRecord(self.record(*args, **kwargs))
+    def segments(self, count, channels=None, poll_interval=0.001,
+                 scheduler=None):
+        '''Acquires count triggered acquisitions (segments) of channels
+        (default: enabled channels); the instrument is re-armed right
+        after each segment is read.  Returns DwfAnalogInSegments.'''
+        if channels is None:
+            channels = self.channelEnabled()
+        size = self.bufferSizeGet()
+        segments = DwfAnalogInSegments(channels, count, size)
+        self.configure(False, True)
+        segments.start = start = time.time()
+        for i in range(count):
+            _status_wait(self, self.frequencyGet, scheduler, poll_interval)
+            done = time.time()
+            segments.timestamps[i] = done - start
+            segments.trigger_positions[i] = self.triggerPositionStatus()
+            # data is already read by status(True), copy it before re-arm
+            for k, idxChannel in enumerate(channels):
+                self.statusData(idxChannel, size, out=segments.data[k][i])
+            if i + 1 < count:
+                self.configure(False, True)
+                segments.dead_times.append(time.time() - done)
+        segments.elapsed = time.time() - start
+        return segments
+    def scan(self, channels=None):
+        '''Returns DwfAnalogInScan, incremental reader for acqmodeScanShift
+        and acqmodeScanScreen'''
+        if channels is None:
+            channels = self.channelEnabled()
+        return DwfAnalogInScan(self, channels)
+    def acquire(self, channels=None, start=True, poll_interval=0.001):
+        '''Coroutine: waits for the acquisition without blocking the event
+        loop and returns samples of channels (default: enabled channels)'''
+        from . import aio
+        return aio.acquire(self, channels, start, poll_interval)
 
 # Acquisition configuration:
     def frequencyInfo(self):
@@ -276,6 +1114,10 @@ class DwfAnalogIn(Dwf):
         _l.FDwfAnalogInChannelEnableSet(self.hdwf, idxChannel, enable)
     def channelEnableGet(self, idxChannel):
         return bool(_l.FDwfAnalogInChannelEnableGet(self.hdwf, idxChannel))
+    def channelEnabled(self):
+        '''Returns list of indexes of enabled channels'''
+        return [ i for i in range(self.channelCount())
+                 if self.channelEnableGet(i) ]
     def channelFilterInfo(self):
         return _make_set(
             _l.FDwfAnalogInChannelFilterInfo(self.hdwf), self.FILTER)
@@ -395,6 +1237,140 @@ class DwfAnalogIn(Dwf):
     def triggerLengthConditionGet(self):
         return self.TRIGLEN(_l.FDwfAnalogInTriggerLengthConditionGet(self.hdwf))
 
+class DwfAnalogInRecord(_DwfRecord):
+    def __init__(self, instrument, channels, chunk=None, limit=None,
+                 poll_interval=0.001, start=True, scheduler=None):
+        self.channels = tuple(channels)
+        super(DwfAnalogInRecord, self).__init__(
+            instrument, len(self.channels), c_double,
+            chunk, limit, poll_interval, start, scheduler)
+    def _frequency(self):
+        return self.instrument.frequencyGet()
+    def _after_trigger(self):
+        # record mode: trigger position is the time after the trigger
+        return int(round(self.instrument.triggerPositionGet() *
+                         self._frequency()))
+    def _read(self, buf, fill, count):
+        self.instrument.statusDataAll(
+            count, _rows_view(buf, fill, fill + count), self.channels)
+
+class DwfAnalogInSegments(object):
+    '''Result of DwfAnalogIn.segments().
+
+    data[k] is an array of shape (count, size) of channels[k]; row i is
+    segment i.  timestamps are seconds from the first arm to the DONE of
+    each segment.  dead_times are seconds from each DONE until the
+    instrument is armed again.'''
+    def __init__(self, channels, count, size):
+        self.channels = tuple(channels)
+        self.count = count
+        self.size = size
+        self.data = tuple([ _alloc_rows(count, size, c_double)
+                            for idxChannel in self.channels ])
+        self.timestamps = [ 0.0 ] * count
+        self.trigger_positions = [ 0.0 ] * count
+        self.dead_times = []
+        self.start = None
+        self.elapsed = 0.0
+    def trigger_rate(self):
+        '''segments per second'''
+        return self.count / self.elapsed if self.elapsed else 0.0
+    def dead_time(self):
+        '''mean dead time in seconds'''
+        if not self.dead_times:
+            return 0.0
+        return sum(self.dead_times) / len(self.dead_times)
+    def metrics(self):
+        return { 'count': self.count,
+                 'elapsed': self.elapsed,
+                 'trigger_rate': self.trigger_rate(),
+                 'dead_time': self.dead_time(),
+                 'max_dead_time': max(self.dead_times or [ 0.0 ]) }
+
+class DwfAnalogInScan(object):
+    '''Incremental reader of scan shift / scan screen acquisitions.
+
+    update() reads only the samples written since the previous update,
+    which are found by statusIndexWrite().  When a buffer or more of
+    samples is written between updates, as estimated by the time since
+    the previous update, the whole buffer is read.
+    Samples are kept in a circular buffer mirrored in two halves, so
+    shift() and screen() return views of it without copy; the views
+    are valid until next update().'''
+    def __init__(self, instrument, channels, size=None):
+        self.instrument = instrument
+        self.channels = tuple(channels)
+        if size is None:
+            size = instrument.bufferSizeGet()
+        self.size = size
+        self.mode = instrument.acquisitionModeGet()
+        self.frequency = instrument.frequencyGet()
+        self.index = 0 # write index of the device buffer
+        self.valid = 0
+        self.samples = 0 # count of samples read
+        self._started = False
+        self._time = None # of the previous update
+        self._ranged = _l._available("FDwfAnalogInStatusData2")
+        self._buf = _alloc_rows(len(self.channels), 2 * size, c_double)
+
+    def update(self, read_status=True):
+        '''Reads new samples, and returns the count of them.  When
+        read_status is False, status(True) must be called before.'''
+        if read_status:
+            self.instrument.status(True)
+        index = self.instrument.statusIndexWrite() % self.size
+        valid = min(self.instrument.statusSamplesValid(), self.size)
+        now = time.time()
+        if self._started:
+            new = (index - self.index) % self.size
+            # the write index wrapped around to about where it was
+            if (now - self._time) * self.frequency > new + self.size // 2:
+                new = self.size
+            new = min(new, valid)
+        else:
+            new = valid
+        if new:
+            self._fetch(index, valid, new)
+        self._started = True
+        self._time = now
+        self.index = index
+        self.valid = valid
+        self.samples += new
+        return new
+
+    def _fetch(self, index, valid, new):
+        # circular range [index - new, index) split to contiguous parts,
+        # with their offsets in the data of the device
+        pos = (index - new) % self.size
+        first = min(new, self.size - pos)
+        parts = [ (pos, first) ]
+        if new > first:
+            parts.append((0, new - first))
+        if self.mode == self.instrument.ACQMODE.SCAN_SCREEN:
+            offsets = [ p for p, n in parts ]
+        else:
+            # scan shift returns samples in time order
+            offsets = [ valid - new, valid - new + first ]
+        data = None
+        if not self._ranged:
+            data = self.instrument.statusDataAll(valid, channels=self.channels)
+        for i, idxChannel in enumerate(self.channels):
+            row = self._buf[i]
+            for (p, n), offset in zip(parts, offsets):
+                if data is None:
+                    self.instrument.statusData2(
+                        idxChannel, offset, n, out=row[p:p + n])
+                else:
+                    row[p:p + n] = data[i][offset:offset + n]
+                row[p + self.size:p + self.size + n] = row[p:p + n]
+
+    def shift(self):
+        '''Returns valid samples in time order, oldest first'''
+        stop = self.index + self.size
+        return _rows_view(self._buf, stop - self.valid, stop)
+    def screen(self):
+        '''Returns the buffer in device order; the scan bar is at index'''
+        return _rows_view(self._buf, 0, self.size)
 
 # ANALOG OUT INSTRUMENT FUNCTIONS
 class DwfAnalogOut(Dwf):
@@ -423,6 +1399,15 @@ class DwfAnalogOut(Dwf):
         DISABLE = _l.DwfAnalogOutIdleDisable
         OFFSET = _l.DwfAnalogOutIdleOffset
         INITIAL = _l.DwfAnalogOutIdleInitial
+
+    # nodeModulation is an alias of nodeAmplitude
+    _SETTINGS = (
+        ('master', 1), ('mode', 1), ('idle', 1), ('limitation', 1),
+        ('nodeEnable', 2), ('nodeFunction', 2), ('nodeFrequency', 2),
+        ('nodeAmplitude', 2), ('nodeOffset', 2), ('nodeSymmetry', 2),
+        ('nodePhase', 2), ('customAMFMEnable', 1), ('triggerSource', 1),
+        ('repeatTrigger', 1), ('run', 1), ('wait', 1), ('repeat', 1),
+        )
     
 # Configuration:
     def channelCount(self): # changed names
@@ -457,7 +1442,7 @@ class DwfAnalogOut(Dwf):
     def waitSet(self, idxChannel, secWait):
         _l.FDwfAnalogOutWaitSet(self.hdwf, idxChannel, secWait)
     def waitGet(self, idxChannel):
-        return _l.FDwfAnalogOutWaitGet(self, idxChannel)
+        return _l.FDwfAnalogOutWaitGet(self.hdwf, idxChannel)
 
     def repeatInfo(self, idxChannel):
         return _l.FDwfAnalogOutRepeatInfo(self.hdwf, idxChannel)
@@ -520,23 +1505,23 @@ class DwfAnalogOut(Dwf):
         _l.FDwfAnalogOutNodeFrequencySet(
             self.hdwf, idxChannel, node, hzFrequency)
     def nodeFrequencyGet(self, idxChannel, node):
-        return _l.FDwfAnalogOutNodeFrequencySet(self.hdwf, idxChannel, node)
+        return _l.FDwfAnalogOutNodeFrequencyGet(self.hdwf, idxChannel, node)
 
 # Carrier Amplitude or Modulation Index 
     def nodeAmplitudeInfo(self, idxChannel, node):
-        return _l.FDwfAnalogOutNodeAmplitudeInfo(self, idxChannel, node)
+        return _l.FDwfAnalogOutNodeAmplitudeInfo(self.hdwf, idxChannel, node)
     def nodeAmplitudeSet(self, idxChannel, node, amplitude):
         _l.FDwfAnalogOutNodeAmplitudeSet(self.hdwf, idxChannel, node, amplitude)
     def nodeAmplitudeGet(self, idxChannel, node):
-        return _l.FDwfAnalogOutNodeAmplitudeSet(self.hdwf, idxChannel, node)
+        return _l.FDwfAnalogOutNodeAmplitudeGet(self.hdwf, idxChannel, node)
 
+    # nodeAmplitude by another name, so they share its shadow entry
     def nodeModulationInfo(self, idxChannel, node):
-        return _l.FDwfAnalogOutNodeAmplitudeInfo(self, idxChannel, node)
+        return self.nodeAmplitudeInfo(idxChannel, node)
     def nodeModulationSet(self, idxChannel, node, modulation):
-        _l.FDwfAnalogOutNodeAmplitudeSet(
-            self.hdwf, idxChannel, node, modulation)
+        self.nodeAmplitudeSet(idxChannel, node, modulation)
     def nodeModulationGet(self, idxChannel, node):
-        return _l.FDwfAnalogOutNodeAmplitudeSet(self.hdwf, idxChannel, node)
+        return self.nodeAmplitudeGet(idxChannel, node)
 
     def nodeOffsetInfo(self, idxChannel, node):
         return _l.FDwfAnalogOutNodeOffsetInfo(self.hdwf, idxChannel, node)
@@ -563,6 +1548,7 @@ class DwfAnalogOut(Dwf):
     def nodeDataInfo(self, idxChannel, node):
         return _l.FDwfAnalogOutNodeDataInfo(self.hdwf, idxChannel, node)
     def nodeDataSet(self, idxChannel, node, rgdData):
+        '''rgdData: float64 buffer is passed without copy'''
         _l.FDwfAnalogOutNodeDataSet(self.hdwf, idxChannel, node, rgdData)
 
 # needed for EExplorer, don't care for ADiscovery
@@ -578,16 +1564,42 @@ class DwfAnalogOut(Dwf):
         else:
             super(DwfAnalogOut, self).__init__(idxDevice, idxCfg)
     def reset(self, idxChannel=-1, parent=False):
-        if parent: super(DwfAnalogIn, self).reset()
+        if parent: super(DwfAnalogOut, self).reset()
+        self._invalidate('DwfAnalogOut')
         _l.FDwfAnalogOutReset(self.hdwf, idxChannel)
     def configure(self, idxChannel, start):
         _l.FDwfAnalogOutConfigure(self.hdwf, idxChannel, start)
+    def apply(self, cfg, start=False):
+        '''Sets settings of DwfConfig cfg which differ from the last
+        apply(), and starts all channels if start; returns the count
+        of Sets'''
+        count = self._apply(cfg)
+        if start:
+            self.configure(-1, True)
+        return count
     def status(self, idxChannel):
         return self.STATE(_l.FDwfAnalogOutStatus(self.hdwf, idxChannel))
+    def wait_done(self, idxChannel, poll_interval=0.001):
+        '''Coroutine: waits until the channel is DONE'''
+        from . import aio
+        return aio.wait_state(self, self.status, (idxChannel,),
+                              poll_interval=poll_interval)
     def nodePlayStatus(self, idxChannel, node):
         return _l.FDwfAnalogOutNodePlayStatus(self.hdwf, idxChannel, node)
     def nodePlayData(self, idxChannel, node, rgdData):
+        '''rgdData: float64 buffer is passed without copy'''
         _l.FDwfAnalogOutNodePlayData(self.hdwf, idxChannel, node, rgdData)
+    def play_stream(self, idxChannel, source, chunk=4096, prefill=None,
+                    node=None, poll_interval=0.001, start=True,
+                    drain=True):
+        '''Starts and returns DwfPlayStream, which feeds samples of source
+        (array, iterator of arrays, or path of WAV/raw file) in funcPlay
+        mode on a thread; see dwf.playback'''
+        from .playback import DwfPlayStream
+        play = DwfPlayStream(self, idxChannel, source, chunk, prefill,
+                             node, poll_interval, start, drain)
+        play.start()
+        return play
 
 # ANALOG IO INSTRUMENT FUNCTIONS
 class DwfAnalogIO(Dwf):
@@ -667,7 +1679,7 @@ class DwfDigitalIO(Dwf):
 
 # Configure:
     def outputEnableInfo(self):
-        return _l.FDwfDigitalIOOutputEnableInfo(self)
+        return _l.FDwfDigitalIOOutputEnableInfo(self.hdwf)
     def outputEnableSet(self, output_enable):
         _l.FDwfDigitalIOOutputEnableSet(self.hdwf, output_enable)
     def outputEnableGet(self):
@@ -703,6 +1715,13 @@ class DwfDigitalIn(Dwf):
         # alternate samples: noise|sample|noise|sample|... 
         # where noise is more than 1 transition between 2 samples
         NOISE = _l.DwfDigitalInSampleModeNoise
+
+    _SETTINGS = (
+        ('acquisitionMode', 0), ('clockSource', 0), ('divider', 0),
+        ('sampleFormat', 0), ('sampleMode', 0), ('bufferSize', 0),
+        ('triggerSource', 0), ('trigger', 0), ('triggerPosition', 0),
+        ('triggerAutoTimeout', 0),
+        )
     
 # Control and status:
     def __init__(self, idxDevice=-1, idxCfg=None):
@@ -712,9 +1731,17 @@ class DwfDigitalIn(Dwf):
             super(DwfDigitalIn, self).__init__(idxDevice, idxCfg)
     def reset(self, parent=False):
         if parent: super(DwfDigitalIn, self).reset()
+        self._invalidate('DwfDigitalIn')
         _l.FDwfDigitalInReset(self.hdwf)
     def configure(self, reconfigure, start):
         return _l.FDwfDigitalInConfigure(self.hdwf, reconfigure, start)
+    def apply(self, cfg, start=False):
+        '''Sets settings of DwfConfig cfg which differ from the last
+        apply(), then configures once; returns the count of Sets'''
+        count = self._apply(cfg)
+        if count or start:
+            self.configure(True, start)
+        return count
     def status(self, read_data):
         return self.STATE(_l.FDwfDigitalInStatus(self.hdwf, read_data))
     def statusSamplesLeft(self):
@@ -725,20 +1752,46 @@ class DwfDigitalIn(Dwf):
         return _l.FDwfDigitalInStatusIndexWrite(self.hdwf)
     def statusAutoTriggered(self):
         return bool(_l.FDwfDigitalInStatusAutoTriggered(self.hdwf))
-    def statusData(self, count):
-        bit_width = self.sampleFormatGet()
-        countOfDataBytes = count * (bit_width // 8)
-        data = _l.FDwfDigitalInStatusData(self.hdwf, countOfDataBytes)
-        if bit_width == 16:
-            data = [ (data[2*i+1] & 0xff) << 8 | (data[2*i] & 0xff)
-                     for i in range(len(data) // 2) ]
-        elif bit_width == 32:
-            data = [ (data[4*i+3] & 0xff) << 24 | ((data[4*i+2] & 0xff) << 16) |
-                     ((data[4*i+1] & 0xff) << 8) | (data[4*i] & 0xff)
-                     for i in range(len(data) // 4) ]
-        return data
+    def statusData(self, count, sample_format=None, out=None):
+        '''Returns samples as uint8/16/32 numpy.ndarray (array.array
+        without numpy).  Pass sample_format to skip sampleFormatGet(),
+        and out to fill a buffer of same word size in place.'''
+        if sample_format is None:
+            sample_format = self.sampleFormatGet()
+        size = sample_format // 8
+        if out is not None:
+            if memoryview(out).itemsize != size:
+                raise TypeError("out must be a buffer of %d-bit words" %
+                                sample_format)
+            return _l.FDwfDigitalInStatusData(self.hdwf, count * size, out=out)
+        data = _l.FDwfDigitalInStatusData(
+            self.hdwf, count * size, as_array=True)
+        return _l._as_words(data, size)
     def statusRecord(self):
         return _l.FDwfDigitalInStatusRecord(self.hdwf)
+    def statusWait(self, scheduler=None, poll_interval=0.001):
+        '''Polls status(True) until DONE, by scheduler or poll_interval'''
+        return _status_wait(self, self.frequency, scheduler, poll_interval)
+    def record(self, chunk=None, samples=None, duration=None,
+               poll_interval=0.001, start=True, scheduler=None):
+        '''Returns DwfDigitalInRecord which yields arrays of uint8/16/32
+        samples in acqmodeRecord.  Each array has chunk samples, or all
+        available samples if chunk is None.  Stops after samples, or
+        duration seconds of samples (internal clock), or when the
+        acquisition is done.'''
+        if duration is not None:
+            samples = int(round(duration * self.frequency()))
+        return DwfDigitalInRecord(self, self.sampleFormatGet(), chunk,
+                                  samples, poll_interval, start, scheduler)
+    def arecord(self, *args, **kwargs):
+        '''Asynchronous iterator version of record()'''
+        from . import aio
+        return aio.AsyncRecord(self.record(*args, **kwargs))
+    def acquire(self, start=True, poll_interval=0.001):
+        '''Coroutine: waits for the acquisition without blocking the event
+        loop and returns samples'''
+        from . import aio
+        return aio.acquire(self, None, start, poll_interval)
 
 # Acquistion configuration:
     def internalClockInfo(self):
@@ -749,15 +1802,18 @@ class DwfDigitalIn(Dwf):
             _l.FDwfDigitalInClockSourceInfo(self.hdwf), self.CLOCKSOURCE)
     def clockSourceSet(self, clock_source):
         _l.FDwfDigitalInClockSourceSet(self.hdwf, clock_source)
-    def clockSourceGet(self, clock_source):
+    def clockSourceGet(self, clock_source=None): # clock_source is unused
         return self.CLOCKSOURCE(_l.FDwfDigitalInClockSourceGet(self.hdwf))
 
     def dividerInfo(self):
         return _l.FDwfDigitalInDividerInfo(self.hdwf)
     def dividerSet(self, div):
         _l.FDwfDigitalInDividerSet(self.hdwf, div)
-    def dividerGet(self, div):
+    def dividerGet(self):
         return _l.FDwfDigitalInDividerGet(self.hdwf)
+    def frequency(self):
+        '''sample rate with the internal clock'''
+        return self.internalClockInfo() / self.dividerGet()
 
     def bitsInfo(self):
         '''Returns the number of Digital In bits'''
@@ -772,7 +1828,7 @@ class DwfDigitalIn(Dwf):
         return _l.FDwfDigitalInBufferSizeInfo(self.hdwf)
     def bufferSizeSet(self, size):
         _l.FDwfDigitalInBufferSizeSet(self.hdwf, size)
-    def bufferSizeGet(self, size):
+    def bufferSizeGet(self):
         return _l.FDwfDigitalInBufferSizeGet(self.hdwf)
 
     def sampleModeInfo(self):
@@ -824,6 +1880,25 @@ class DwfDigitalIn(Dwf):
             self.hdwf, level_low, level_high, edge_rise, edge_fall)
     def triggerGet(self):
         return _l.FDwfDigitalInTriggerGet(self.hdwf)
+class DwfDigitalInRecord(_DwfRecord):
+    _CTYPES = { 8: c_ubyte, 16: c_uint16, 32: c_uint32 }
+    def __init__(self, instrument, sample_format, chunk=None, limit=None,
+                 poll_interval=0.001, start=True, scheduler=None):
+        self.sample_format = sample_format
+        super(DwfDigitalInRecord, self).__init__(
+            instrument, 1, self._CTYPES[sample_format],
+            chunk, limit, poll_interval, start, scheduler)
+    def _frequency(self):
+        return self.instrument.frequency()
+    def _after_trigger(self):
+        return self.instrument.triggerPositionGet()
+    def _view(self, buf, start, stop):
+        return buf[0][start:stop]
+    def _rows_of(self, chunk):
+        return (chunk,)
+    def _read(self, buf, fill, count):
+        self.instrument.statusData(
+            count, self.sample_format, out=buf[0][fill:fill + count])
 
 # DIGITAL OUT INSTRUMENT FUNCTIONS
 class DwfDigitalOut(Dwf):
@@ -845,6 +1920,13 @@ class DwfDigitalOut(Dwf):
         HIGH = _l.DwfDigitalOutIdleHigh
         HiZ = _l.DwfDigitalOutIdleZet
 
+    _SETTINGS = (
+        ('enable', 1), ('output', 1), ('type', 1), ('idle', 1),
+        ('dividerInit', 1), ('divider', 1), ('counterInit', 1),
+        ('counter', 1), ('triggerSource', 0), ('repeatTrigger', 0),
+        ('run', 0), ('wait', 0), ('repeat', 0),
+        )
+
 # Control:
     def __init__(self, idxDevice=-1, idxCfg=None):
         if isinstance(idxDevice, Dwf):
@@ -853,11 +1935,23 @@ class DwfDigitalOut(Dwf):
             super(DwfDigitalOut, self).__init__(idxDevice, idxCfg)
     def reset(self, parent=False):
         if parent: super(DwfDigitalOut, self).reset()
+        self._invalidate('DwfDigitalOut')
         return _l.FDwfDigitalOutReset(self.hdwf)
     def configure(self, start):
         _l.FDwfDigitalOutConfigure(self.hdwf, start)
+    def apply(self, cfg, start=False):
+        '''Sets settings of DwfConfig cfg which differ from the last
+        apply(), and starts if start; returns the count of Sets'''
+        count = self._apply(cfg)
+        if start:
+            self.configure(True)
+        return count
     def status(self):
         return self.STATE(_l.FDwfDigitalOutStatus(self.hdwf))
+    def wait_done(self, poll_interval=0.001):
+        '''Coroutine: waits until the instrument is DONE'''
+        from . import aio
+        return aio.wait_state(self, self.status, poll_interval=poll_interval)
 
 # Configuration:
     def internalClockInfo(self):
@@ -868,7 +1962,7 @@ class DwfDigitalOut(Dwf):
             _l.FDwfDigitalOutTriggerSourceInfo(self.hdwf), self.TRIGSRC)
     def triggerSourceSet(self, trigsrc):
         _l.FDwfDigitalOutTriggerSourceSet(self.hdwf, trigsrc)
-    def triggerSourceGet(self, trigsrc):
+    def triggerSourceGet(self, trigsrc=None): # trigsrc is unused
         return self.TRIGSRC(_l.FDwfDigitalOutTriggerSourceGet(self.hdwf))
 
     def runInfo(self):
@@ -918,7 +2012,7 @@ class DwfDigitalOut(Dwf):
 
     def typeInfo(self, idxChannel):
         return _make_set(
-            _l.FDwfDigitalOutTypeInfo(sef.hdwf, idxChannel), self.TYPE)
+            _l.FDwfDigitalOutTypeInfo(self.hdwf, idxChannel), self.TYPE)
     def typeSet(self, idxChannel, output_type):
         _l.FDwfDigitalOutTypeSet(self.hdwf, idxChannel, output_type)
     def typeGet(self, idxChannel):
@@ -956,5 +2050,12 @@ class DwfDigitalOut(Dwf):
 
     def dataInfo(self, idxChannel):
         return _l.FDwfDigitalOutDataInfo(self.hdwf, idxChannel)
-    def dataSet(self, idxChannel, rgBits):
-        _l.FDwfDigitalOutDataSet(self.hdwf, idxChannel, rgBits)
+    def dataSet(self, idxChannel, rgBits, countOfBits=None):
+        '''rgBits: packed bytes, or sequence/array of bits (see lowlevel)'''
+        _l.FDwfDigitalOutDataSet(self.hdwf, idxChannel, rgBits, countOfBits)
+
+for _cls in (DwfAnalogIn, DwfAnalogOut, DwfDigitalIn, DwfDigitalOut):
+    _shadow_methods(_cls)
+for _cls in (Dwf, DwfAnalogIn, DwfAnalogOut, DwfAnalogIO, DwfDigitalIO,
+             DwfDigitalIn, DwfDigitalOut):
+    _capability_methods(_cls)
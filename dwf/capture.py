@@ -0,0 +1,214 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+'''
+===========================================
+Digilent's DWF library wrapper for python.
+===========================================
+
+Binary capture files of DwfAnalogIn / DwfDigitalIn samples.
+
+A capture file is a small header followed by raw little-endian
+samples; samples of channels are interleaved per frame.  Chunks of a
+record stream are appended by bulk writes, and the reader maps the
+file, so opening and slicing do not depend on the size of the file.
+
+  record = dwf_ai.record(samples=N_SAMPLES)
+  with CaptureWriter.for_record("record.dwfcap", record) as f:
+      for chunk in record:
+          f.write(chunk)
+
+  with CaptureReader("record.dwfcap") as f:
+      print(f.frequency, len(f))
+      ch0 = f.channel(0)[1000:2000]
+
+Header (little-endian):
+  magic         8s   b'DWFCAP01'
+  header_size   I    offset of samples
+  frequency     d    sample rate in Hz
+  channels      I    count of channels
+  sample_format c    'd' (float64), 'B', 'H', 'I' (unsigned 8/16/32 bits)
+  trigger       q    sample index of the trigger, -1 if unknown
+  serial        32s  serial number of the device
+  ranges        d * channels
+  offsets       d * channels
+'''
+
+import array
+import mmap
+import os
+import struct
+import sys
+
+from . import lowlevel as _l
+
+MAGIC = b'DWFCAP01'
+_HEADER = struct.Struct('<8sIdIc3xq32s')
+_DTYPES = { 'd': '<f8', 'B': 'u1', 'H': '<u2', 'I': '<u4' }
+_SIZES = { 'd': 8, 'B': 1, 'H': 2, 'I': 4 }
+_IOV_MAX = 512
+
+def _sample_format(ctype):
+    if ctype._type_ == 'd':
+        return 'd'
+    return { 1: 'B', 2: 'H', 4: 'I' }[_l.sizeof(ctype)]
+
+class CaptureWriter(object):
+    '''Writes a capture file; write() appends a chunk of samples, of
+    shape (channels, n) or (n,) for one channel'''
+    def __init__(self, path, frequency, channels=1, sample_format='d',
+                 ranges=None, offsets=None, trigger=-1, serial=''):
+        if sample_format not in _SIZES:
+            raise ValueError("unknown sample format: %r" % (sample_format,))
+        self.path = path
+        self.frequency = frequency
+        self.channels = channels
+        self.sample_format = sample_format
+        self.samples = 0
+        if ranges is None:
+            ranges = [ 0.0 ] * channels
+        if offsets is None:
+            offsets = [ 0.0 ] * channels
+        header_size = _HEADER.size + 16 * channels
+        header_size += -header_size % 16 # align samples
+        header = _HEADER.pack(
+            MAGIC, header_size, frequency, channels,
+            sample_format.encode('ascii'), trigger,
+            serial.encode('ascii')[:32])
+        header += struct.pack('<%dd' % (2 * channels),
+                              *(list(ranges) + list(offsets)))
+        self._file = open(path, 'wb')
+        self._file.write(header + b'\0' * (header_size - len(header)))
+
+    @classmethod
+    def for_record(cls, path, record, trigger=None, serial=None):
+        '''Writer for chunks of DwfAnalogIn.record() / DwfDigitalIn.record();
+        trigger and serial default to those of the instrument'''
+        instrument = record.instrument
+        if trigger is None:
+            trigger = record._trigger()
+        if serial is None:
+            serial = instrument.capabilitiesGet().serial() or ''
+        channels = getattr(record, 'channels', None)
+        ranges = offsets = None
+        if channels is not None:
+            ranges = [ instrument.channelRangeGet(i) for i in channels ]
+            offsets = [ instrument.channelOffsetGet(i) for i in channels ]
+        return cls(path, record._frequency(), record.rows,
+                   _sample_format(record.ctype), ranges, offsets,
+                   trigger, serial)
+
+    def _frames(self, chunk):
+        # bytes-like of interleaved little-endian samples
+        np = _l._numpy()
+        if np is not None:
+            data = np.asarray(chunk, dtype=_DTYPES[self.sample_format])
+            if data.ndim == 2:
+                data = data.T
+            return np.ascontiguousarray(data).reshape(-1)
+        rows = chunk if isinstance(chunk, (list, tuple)) else [ chunk ]
+        if len(rows) == 1 and sys.byteorder == 'little':
+            return memoryview(rows[0]).cast('B')
+        data = array.array(self.sample_format,
+                           bytes(len(rows[0]) * self.channels *
+                                 _SIZES[self.sample_format]))
+        for i, row in enumerate(rows):
+            data[i::self.channels] = array.array(self.sample_format, row)
+        if sys.byteorder == 'big':
+            data.byteswap()
+        return data
+
+    def _count(self, frames):
+        frame = _SIZES[self.sample_format] * self.channels
+        return memoryview(frames).nbytes // frame
+
+    def write(self, chunk):
+        frames = self._frames(chunk)
+        self._file.write(frames)
+        self.samples += self._count(frames)
+
+    def writev(self, chunks):
+        '''Writes chunks by os.writev() if available'''
+        frames = [ self._frames(chunk) for chunk in chunks ]
+        if hasattr(os, 'writev'):
+            self._file.flush()
+            for i in range(0, len(frames), _IOV_MAX):
+                self._writev(frames[i:i + _IOV_MAX])
+        else:
+            for data in frames:
+                self._file.write(data)
+        self.samples += sum([ self._count(data) for data in frames ])
+
+    def _writev(self, frames):
+        # the rest of a short write is written by write()
+        written = os.writev(self._file.fileno(), frames)
+        for data in frames:
+            data = memoryview(data).cast('B')
+            if written < len(data):
+                self._file.write(data[written:])
+                written = len(data)
+            written -= len(data)
+        self._file.flush()
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+    def __enter__(self):
+        return self
+    def __exit__(self, *exc):
+        self.close()
+
+class CaptureReader(object):
+    '''Maps a capture file; data is an array of shape (samples, channels)
+    (a flat memoryview without numpy) which shares the mapped memory'''
+    def __init__(self, path):
+        f = open(path, 'rb')
+        try:
+            header = f.read(_HEADER.size)
+            (magic, header_size, self.frequency, self.channels,
+             sample_format, self.trigger, serial) = _HEADER.unpack(header)
+            if magic != MAGIC:
+                raise ValueError("%s is not a capture file" % path)
+            params = struct.unpack('<%dd' % (2 * self.channels),
+                                   f.read(16 * self.channels))
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        finally:
+            f.close()
+        self.path = path
+        self.sample_format = sample_format.decode('ascii')
+        self.serial = serial.rstrip(b'\0').decode('ascii')
+        self.ranges = params[:self.channels]
+        self.offsets = params[self.channels:]
+        frame = _SIZES[self.sample_format] * self.channels
+        count = (len(self._mmap) - header_size) // frame
+        self.samples = count
+        np = _l._numpy()
+        if np is not None:
+            self.data = np.frombuffer(
+                self._mmap, dtype=_DTYPES[self.sample_format],
+                count=count * self.channels, offset=header_size
+                ).reshape(count, self.channels)
+        else:
+            self.data = memoryview(self._mmap)[
+                header_size:header_size + count * frame].cast(
+                    self.sample_format)
+
+    def __len__(self):
+        return self.samples
+
+    def channel(self, idx):
+        '''samples of channel idx (strided view of data)'''
+        if _l._numpy() is not None:
+            return self.data[:, idx]
+        return self.data[idx::self.channels]
+
+    def close(self):
+        self.data = None
+        try:
+            self._mmap.close()
+        except BufferError:
+            pass # views are still alive; closed when they are released
+    def __enter__(self):
+        return self
+    def __exit__(self, *exc):
+        self.close()
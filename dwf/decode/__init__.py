@@ -0,0 +1,26 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+'''
+===========================================
+Digilent's DWF library wrapper for python.
+===========================================
+
+Protocol decoders over DwfDigitalIn samples (numpy is required).
+
+Each decoder takes words of samples and the DIO pins of the signals.
+Clock edges are found by comparing each sample with the previous one,
+and frames are extracted in bulk.  feed() decodes chunks of a record
+stream one by one; the state at the end of a chunk (levels, bits of an
+incomplete word) is kept for the next one.  Indices of results are
+counted over all samples fed.
+
+  spi = SpiDecoder(clk=1, mosi=0, cs=2, bits=8, msb_first=False)
+  for chunk in dwf_di.record():
+      words = spi.feed(chunk)
+      print(words.index, words.mosi)
+'''
+
+from .spi import SpiDecoder, SpiWords
+from .i2c import I2cDecoder, I2cBytes
+from .uart import UartDecoder, UartFrames
@@ -0,0 +1,90 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+'''
+===========================================
+Digilent's DWF library wrapper for python.
+===========================================
+
+Helpers of protocol decoders.
+'''
+
+from ..lowlevel import _numpy
+
+_np = _numpy()
+if _np is None:
+    raise ImportError("dwf.decode needs numpy")
+
+def level(samples, pin):
+    '''bool array of DIO pin in samples'''
+    return ((samples >> pin) & 1).astype(bool)
+
+def previous(levels, last):
+    '''levels shifted by one sample; last is the level before them, or
+    None to have no edge at the first sample'''
+    if last is None:
+        last = levels[0] if len(levels) else False
+    return _np.concatenate([ [ last ], levels[:-1] ])
+
+def rising(levels, last):
+    return _np.flatnonzero(levels & ~previous(levels, last))
+
+def falling(levels, last):
+    return _np.flatnonzero(~levels & previous(levels, last))
+
+class WordAssembler(object):
+    '''Groups bits sampled at clock edges to words of nbits.  Segments
+    of bits are separated by boundaries (e.g. deselect, start, stop);
+    an incomplete word at the end of a segment is dropped, and one at the
+    end of a chunk is kept for the next chunk.'''
+    def __init__(self, nbits, msb_first=True, lanes=1):
+        self.nbits = nbits
+        self.lanes = lanes
+        if msb_first:
+            shifts = _np.arange(nbits - 1, -1, -1)
+        else:
+            shifts = _np.arange(nbits)
+        self._shifts = shifts.astype(_np.uint64)
+        self._index = _np.zeros(0, dtype=_np.int64)
+        self._bits = _np.zeros((lanes, 0), dtype=_np.uint64)
+        self._done = 0 # bits of the open segment before the kept bits
+
+    def feed(self, index, bits, boundaries):
+        '''index: sample indices of clock edges, bits: (lanes, edges) of
+        sampled bits, boundaries: sample indices where segments end.
+        Returns (index, words, first): index of the first bit of words,
+        words of shape (lanes, n), and if each word starts a segment'''
+        index = _np.concatenate([ self._index, index ])
+        bits = _np.concatenate(
+            [ self._bits, _np.asarray(bits, dtype=_np.uint64) ], axis=1)
+        count = len(index)
+        if count == 0:
+            if len(boundaries):
+                self._done = 0
+            return (index, bits, _np.zeros(0, dtype=bool))
+        segment = _np.searchsorted(boundaries, index, 'right')
+        starts = _np.flatnonzero(
+            _np.concatenate([ [ True ], segment[1:] != segment[:-1] ]))
+        run = _np.cumsum(
+            _np.concatenate([ [ 0 ], segment[1:] != segment[:-1] ]))
+        rank = _np.arange(count) - starts[run]
+        if segment[0] == 0:
+            # continues the open segment of the previous chunk
+            rank[run == 0] += self._done
+        lengths = _np.diff(_np.append(starts, count))
+        if segment[0] == 0:
+            lengths[0] += self._done
+        full = lengths // self.nbits * self.nbits
+        keep = rank < full[run]
+        if segment[-1] == len(boundaries): # the last segment is open
+            tail = (run == run[-1]) & ~keep
+            self._done = int(full[-1])
+        else:
+            tail = _np.zeros(count, dtype=bool)
+            self._done = 0
+        self._index = index[tail]
+        self._bits = bits[:, tail]
+        words = bits[:, keep].reshape(self.lanes, -1, self.nbits)
+        words = (words << self._shifts).sum(axis=2)
+        first = rank[keep][::self.nbits] == 0
+        return index[keep][::self.nbits], words, first
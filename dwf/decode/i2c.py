@@ -0,0 +1,67 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+'''
+===========================================
+Digilent's DWF library wrapper for python.
+===========================================
+
+I2C decoder.
+'''
+
+from collections import namedtuple
+
+from ._common import _np, level, previous, rising, WordAssembler
+
+# index: sample index of the first bit, data: bytes, ack: True if
+# acknowledged, start: True for the first byte (address) after a START
+I2cBytes = namedtuple('I2cBytes', 'index data ack start')
+
+class I2cDecoder(object):
+    '''Decodes bytes (8 bits and ACK) sampled on rising edges of scl
+    between START (or repeated START) and STOP conditions'''
+    def __init__(self, scl, sda):
+        self.scl = scl
+        self.sda = sda
+        self.samples = 0
+        self._words = WordAssembler(9, True, 1)
+        self._scl = None
+        self._sda = None
+        self._busy = False # in transaction
+
+    def feed(self, samples):
+        '''Returns I2cBytes of bytes completed in samples'''
+        samples = _np.asarray(samples)
+        scl = level(samples, self.scl)
+        sda = level(samples, self.sda)
+        sda_prev = previous(sda, self._sda)
+        high = scl & previous(scl, self._scl)
+        starts = _np.flatnonzero(high & sda_prev & ~sda)
+        stops = _np.flatnonzero(high & ~sda_prev & sda)
+        events = _np.concatenate([ starts, stops ])
+        order = _np.argsort(events, kind='mergesort')
+        events = events[order]
+        is_start = (order < len(starts))
+        edges = rising(scl, self._scl)
+        if len(events):
+            # state of the last event before each edge
+            last = _np.searchsorted(events, edges, 'right') - 1
+            busy = _np.where(last >= 0, is_start[_np.maximum(last, 0)],
+                             self._busy)
+            edges = edges[busy]
+            self._busy = bool(is_start[-1])
+        elif not self._busy:
+            edges = edges[:0]
+        if len(samples):
+            self._scl = scl[-1]
+            self._sda = sda[-1]
+        index, words, first = self._words.feed(
+            edges + self.samples, sda[edges].reshape(1, -1),
+            events + self.samples)
+        self.samples += len(samples)
+        words = words[0]
+        return I2cBytes(index, words >> 1, (words & 1) == 0, first)
+
+    def decode(self, samples):
+        '''Decodes samples at once'''
+        return self.feed(samples)
@@ -0,0 +1,68 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+'''
+===========================================
+Digilent's DWF library wrapper for python.
+===========================================
+
+SPI decoder.
+'''
+
+from collections import namedtuple
+
+from ._common import _np, level, previous, rising, falling, WordAssembler
+
+# index: sample index of the first bit, mosi/miso: words or None
+SpiWords = namedtuple('SpiWords', 'index mosi miso')
+
+class SpiDecoder(object):
+    '''Decodes words of bits on clk edges.  Data is sampled on the
+    leading edge of clock if cpha is 0, on the trailing edge if 1; clock
+    idles at cpol.  If cs is given, bits are counted while cs is at
+    cs_active, and an incomplete word is dropped on deselect.'''
+    def __init__(self, clk, mosi=None, miso=None, cs=None, cpol=0, cpha=0,
+                 bits=8, msb_first=True, cs_active=0):
+        self.clk = clk
+        self.pins = [ pin for pin in (mosi, miso) if pin is not None ]
+        self.mosi = mosi
+        self.miso = miso
+        self.cs = cs
+        self.cs_active = bool(cs_active)
+        self.sample_rising = bool(cpol) == bool(cpha)
+        self.samples = 0
+        self._words = WordAssembler(bits, msb_first, len(self.pins))
+        self._clk = None
+        self._selected = None
+
+    def feed(self, samples):
+        '''Returns SpiWords of words completed in samples'''
+        samples = _np.asarray(samples)
+        clk = level(samples, self.clk)
+        if self.sample_rising:
+            edges = rising(clk, self._clk)
+        else:
+            edges = falling(clk, self._clk)
+        boundaries = _np.zeros(0, dtype=_np.int64)
+        if self.cs is not None:
+            selected = level(samples, self.cs) == self.cs_active
+            edges = edges[selected[edges]]
+            boundaries = _np.flatnonzero(
+                ~selected & previous(selected, self._selected))
+            if len(selected):
+                self._selected = selected[-1]
+        if len(clk):
+            self._clk = clk[-1]
+        bits = [ level(samples[edges], pin) for pin in self.pins ]
+        index, words, first = self._words.feed(
+            edges + self.samples, _np.array(bits).reshape(len(bits), -1),
+            boundaries + self.samples)
+        self.samples += len(samples)
+        lanes = iter(words)
+        mosi = next(lanes) if self.mosi is not None else None
+        miso = next(lanes) if self.miso is not None else None
+        return SpiWords(index, mosi, miso)
+
+    def decode(self, samples):
+        '''Decodes samples at once'''
+        return self.feed(samples)
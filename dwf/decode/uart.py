@@ -0,0 +1,88 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+'''
+===========================================
+Digilent's DWF library wrapper for python.
+===========================================
+
+UART decoder.
+'''
+
+from collections import namedtuple
+
+from ._common import _np, level
+
+FRAMING_ERROR = 1
+PARITY_ERROR = 2
+
+# index: sample index of the start bit, data: characters,
+# error: FRAMING_ERROR | PARITY_ERROR bits
+UartFrames = namedtuple('UartFrames', 'index data error')
+
+class UartDecoder(object):
+    '''Decodes frames on rx (idle high, lsb first).  Bits are sampled at
+    the middle of bit times from the falling edge of the start bit;
+    parity is None, 'even' or 'odd'.'''
+    def __init__(self, rx, frequency, baud, bits=8, parity=None, stop=1,
+                 invert=False):
+        if parity not in (None, 'even', 'odd'):
+            raise ValueError("unknown parity: %r" % (parity,))
+        self.rx = rx
+        self.bits = bits
+        self.parity = parity
+        self.invert = invert
+        fields = 1 + bits + (parity is not None) + 1 # checks one stop bit
+        per_bit = float(frequency) / baud
+        self._offsets = ((_np.arange(fields) + 0.5) * per_bit).astype(
+            _np.int64)
+        self.samples = 0
+        self._tail = _np.zeros(0, dtype=bool)
+        self._resume = 0 # the next start bit is not before this
+
+    def feed(self, samples):
+        '''Returns UartFrames of frames completed in samples'''
+        rx = level(_np.asarray(samples), self.rx)
+        if self.invert:
+            rx = ~rx
+        line = _np.concatenate([ self._tail, rx ])
+        base = self.samples - len(self._tail)
+        self.samples += len(rx)
+        candidates = _np.flatnonzero(line[:-1] & ~line[1:]) + 1
+        stop = self._offsets[-1]
+        starts = []
+        pending = None
+        i = _np.searchsorted(candidates, self._resume - base)
+        while i < len(candidates):
+            start = candidates[i]
+            if start + stop >= len(line):
+                pending = start
+                break
+            if line[start + self._offsets[0]]: # glitch, not a start bit
+                i += 1
+                continue
+            starts.append(start)
+            i = _np.searchsorted(candidates, start + stop)
+        if starts:
+            self._resume = base + starts[-1] + stop
+        if pending is not None:
+            self._tail = line[pending - 1:]
+        else:
+            self._tail = line[-1:]
+        return self._frames(line, _np.array(starts, dtype=_np.int64), base)
+
+    def _frames(self, line, starts, base):
+        fields = line[starts[:, None] + self._offsets].astype(_np.int64)
+        data_bits = fields[:, 1:1 + self.bits]
+        data = (data_bits << _np.arange(self.bits)).sum(axis=1)
+        error = _np.where(fields[:, -1] == 0, FRAMING_ERROR, 0)
+        if self.parity is not None:
+            ones = data_bits.sum(axis=1) + fields[:, 1 + self.bits]
+            odd = (ones & 1) == 1
+            bad = ~odd if self.parity == 'odd' else odd
+            error |= _np.where(bad, PARITY_ERROR, 0)
+        return UartFrames(starts + base, data, error)
+
+    def decode(self, samples):
+        '''Decodes samples at once'''
+        return self.feed(samples)
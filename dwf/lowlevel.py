@@ -26,7 +26,24 @@ This code is tested with Waveforms SDK, October 12, 2015 version.
 
 import sys
 import os
+import array
 from ctypes import *
+from ctypes import _Pointer
+
+# numpy is optional, and imported on first use by _numpy(); without it
+# array results are returned as memoryview
+_np = False
+
+def _numpy():
+    # numpy module, or None if it is not installed
+    global _np
+    if _np is False:
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        _np = numpy
+    return _np
 
 if sys.platform.startswith("win"):
     dwfdll = cdll.dwf
@@ -233,6 +250,83 @@ def _mkstring(buf):
         return bytes(buf.value).decode('latin-1')
     return str(buf.value)
 
+def _as_array(buf):
+    # wrap a ctypes array without copy
+    np = _numpy()
+    if np is not None:
+        return np.ctypeslib.as_array(buf)
+    return memoryview(buf).cast('B').cast(buf._type_._type_)
+
+def _as_words(buf, size):
+    # reinterpret little-endian bytes as unsigned words of size bytes
+    np = _numpy()
+    if np is not None:
+        return np.frombuffer(buf, dtype='<u%d' % size)
+    code = [ c for c in 'BHIL' if array.array(c).itemsize == size ][0]
+    words = array.array(code, bytes(memoryview(buf)))
+    if sys.byteorder == 'big':
+        words.byteswap()
+    return words
+
+def _out_buffer(out, ctype, count):
+    # ctypes array of count items which shares memory with out
+    if memoryview(out).format.lstrip('@=<') != ctype._type_:
+        raise TypeError("out must be a contiguous buffer of %s" %
+                        ctype.__name__)
+    return (ctype * count).from_buffer(out)
+
+def _in_buffer(data, ctype, count=None):
+    # (pointer or ctypes array, count) of data as ctype; a contiguous buffer
+    # of ctype is passed without copy, others are converted at once
+    if isinstance(data, _Pointer):
+        return data, count
+    np = _numpy()
+    if np is not None:
+        data = np.ascontiguousarray(data, dtype=ctype).reshape(-1)
+        buf = data.ctypes.data_as(POINTER(ctype))
+    else:
+        try:
+            view = memoryview(data)
+        except TypeError:
+            view = None
+        if view is not None and view.c_contiguous and \
+           view.format.lstrip('@=<') == ctype._type_:
+            data = view.cast('B').cast(ctype._type_)
+            if view.readonly:
+                buf = (ctype * len(data)).from_buffer_copy(data)
+            else:
+                buf = (ctype * len(data)).from_buffer(data)
+        else:
+            buf = (ctype * len(data))(*data)
+    if count is None:
+        count = len(data)
+    elif count > len(data):
+        raise ValueError("count of data is %d, but %d" % (len(data), count))
+    return buf, count
+
+def _byte_buffer(data):
+    # c_ubyte array of bytes-like data, without copy if it is writable
+    view = memoryview(data)
+    size = len(view) * view.itemsize
+    if view.readonly:
+        return (c_ubyte * size).from_buffer_copy(view)
+    return (c_ubyte * size).from_buffer(view)
+
+def _pack_bits(bits):
+    # pack truth values lsb first; a sequence of tuples (or an array of
+    # shape (n, 2)) is flattened to IO, OE, IO, OE...
+    np = _numpy()
+    if np is not None:
+        bits = np.asarray(bits, dtype=bool).ravel()
+        return _byte_buffer(np.packbits(bits, bitorder='little')), len(bits)
+    if len(bits) and isinstance(bits[0], (tuple, list)):
+        bits = [ b for sample in bits for b in sample ]
+    packed = bytearray((len(bits) + 7) // 8)
+    for k in range(8):
+        for i, b in enumerate(bits[k::8]):
+            if b: packed[i] |= 1 << k
+    return _byte_buffer(packed), len(bits)
+
 _ARGIN = 1
 _ARGOUT = 2
 _ARGIN_WITH_ZERO = 4
@@ -245,14 +339,59 @@ def _errcheck(result, func, args):
         raise DWFError(err.value, _mkstring(errmsg), (func, args))
     return args
 
-def _define(funcname, protos, params, prefix=""):
+# Every prototype is recorded in _prototypes.  By default it is bound to
+# dwfdll at import time.  If DWF_LAZY_BINDING is set in the environment,
+# only a small placeholder is created, and the ctypes function is built on
+# the first call; short-lived tools which use a few functions start faster.
+_lazy_binding = os.environ.get("DWF_LAZY_BINDING", "0") not in ("", "0")
+_prototypes = {}
+
+def _bind(name):
+    funcname, protos, params = _prototypes[name]
     prototype = CFUNCTYPE(BOOL, *protos)
     func = prototype((funcname, dwfdll), params)
     func.errcheck = _errcheck
-    globals()[prefix + funcname] = func
+    globals()[name] = func
+    return func
+
+class _LazyFunction(object):
+    __slots__ = ('name', 'func')
+    def __init__(self, name):
+        self.name = name
+        self.func = None
+    def bind(self):
+        if self.func is None:
+            self.func = _bind(self.name)
+        return self.func
+    def __call__(self, *args, **kwargs):
+        return (self.func or self.bind())(*args, **kwargs)
+    def __getattr__(self, attr):
+        return getattr(self.bind(), attr)
+    def __repr__(self):
+        return "<lazy DWF function %s>" % self.name
+
+def bind_all():
+    '''Bind all functions which are not yet bound (for lazy binding)'''
+    for name in _prototypes:
+        func = globals()[name]
+        if isinstance(func, _LazyFunction) and \
+           _available(_prototypes[name][0]):
+            func.bind()
+
+# optional functions, which are not in older libraries, are always bound
+# lazily; check them with _available() before calling
+def _define(funcname, protos, params, prefix="", optional=False):
+    _prototypes[prefix + funcname] = (funcname, protos, params)
+    if _lazy_binding or optional:
+        globals()[prefix + funcname] = _LazyFunction(prefix + funcname)
+    else:
+        _bind(prefix + funcname)
+
+def _xdefine(funcname, protos, params, optional=False):
+    _define(funcname, protos, params, prefix="_", optional=optional)
 
-def _xdefine(funcname, protos, params):
-    _define(funcname, protos, params, prefix="_")
+def _available(funcname):
+    return hasattr(dwfdll, funcname)
 
 # Error and version APIs:
 #  FDwfGetLastError(DWFERC *pdwferc);
@@ -403,30 +542,75 @@ _xdefine("FDwfAnalogInStatusData",
          (HDWF, c_int, POINTER(c_double), c_int,),
          ((_ARGIN, "hdwf"), (_ARGIN, "idxChannel"),
           (_ARGIN, "rgdVoltData"), (_ARGIN, "cdData"),))
-def FDwfAnalogInStatusData(hdwf, idxChannel,
-                           rgdVoltData_or_cdData, cdData=None):
+def FDwfAnalogInStatusData(hdwf, idxChannel, rgdVoltData_or_cdData=None,
+                           cdData=None, out=None, as_array=False):
     if cdData is not None:
         return _FDwfAnalogInStatusData(hdwf, idxChannel,
                                        rgdVoltData_or_cdData, cdData)
     cdData = rgdVoltData_or_cdData
+    if out is not None:
+        if cdData is None: cdData = len(out)
+        _FDwfAnalogInStatusData(hdwf, idxChannel,
+                                _out_buffer(out, c_double, cdData), cdData)
+        return out
     rgdVoltData = (c_double * cdData)()
     _FDwfAnalogInStatusData(hdwf, idxChannel, rgdVoltData, cdData)
+    if as_array:
+        return _as_array(rgdVoltData)
+    return tuple(rgdVoltData)
+# out: contiguous float64 buffer (numpy.ndarray, array('d') ...) to fill
+# as_array: return numpy.ndarray (or memoryview) sharing the read buffer
+#  FDwfAnalogInStatusData2(HDWF hdwf, int idxChannel, double *rgdVoltData, int idxData, int cdData);
+# not in older libraries
+_xdefine("FDwfAnalogInStatusData2",
+         (HDWF, c_int, POINTER(c_double), c_int, c_int,),
+         ((_ARGIN, "hdwf"), (_ARGIN, "idxChannel"),
+          (_ARGIN, "rgdVoltData"), (_ARGIN, "idxData"), (_ARGIN, "cdData"),),
+         optional=True)
+def FDwfAnalogInStatusData2(hdwf, idxChannel, rgdVoltData_or_idxData,
+                            idxData_or_cdData=None, cdData=None,
+                            out=None, as_array=False):
+    if cdData is not None:
+        return _FDwfAnalogInStatusData2(hdwf, idxChannel,
+                                        rgdVoltData_or_idxData,
+                                        idxData_or_cdData, cdData)
+    idxData, cdData = rgdVoltData_or_idxData, idxData_or_cdData
+    if out is not None:
+        if cdData is None: cdData = len(out)
+        _FDwfAnalogInStatusData2(hdwf, idxChannel,
+                                 _out_buffer(out, c_double, cdData),
+                                 idxData, cdData)
+        return out
+    rgdVoltData = (c_double * cdData)()
+    _FDwfAnalogInStatusData2(hdwf, idxChannel, rgdVoltData, idxData, cdData)
+    if as_array:
+        return _as_array(rgdVoltData)
     return tuple(rgdVoltData)
 #  FDwfAnalogInStatusNoise(HDWF hdwf, int idxChannel, double *rgdMin, double *rgdMax, int cdData);
 _xdefine("FDwfAnalogInStatusNoise",
          (HDWF, c_int, POINTER(c_double), POINTER(c_double), c_int,),
          ((_ARGIN, "hdwf"), (_ARGIN, "idxChannel"),
           (_ARGIN, "rgdMin"), (_ARGIN, "rgdMax"), (_ARGIN, "cdData"),))
-def FDwfAnalogInStatusNoise(hdwf, dxChannel,
-                            rgdMin_or_cdData, rgdMax=None, cdData=None):
+def FDwfAnalogInStatusNoise(hdwf, dxChannel, rgdMin_or_cdData=None,
+                            rgdMax=None, cdData=None, out=None, as_array=False):
     if rgdMax is not None and cdData is not None:
         return _FDwfAnalogInStatusNoise(
             hdwf, dxChannel, rgdMin_or_cdData, rgdMax, cdData)
     cdData = rgdMin_or_cdData
+    if out is not None:
+        outMin, outMax = out
+        if cdData is None: cdData = len(outMin)
+        _FDwfAnalogInStatusNoise(hdwf, dxChannel,
+                                 _out_buffer(outMin, c_double, cdData),
+                                 _out_buffer(outMax, c_double, cdData), cdData)
+        return out
     rgdMin = (c_double * cdData)()
     rgdMax = (c_double * cdData)()
     _FDwfAnalogInStatusNoise(hdwf, dxChannel, rgdMin, rgdMax, cdData)
+    if as_array:
+        return _as_array(rgdMin), _as_array(rgdMax)
     return tuple(rgdMin), tuple(rgdMax)
+# out: pair of contiguous float64 buffers to fill (min, max)
 
 #  FDwfAnalogInStatusSample(HDWF hdwf, int idxChannel, double *pdVoltSample);
 _define("FDwfAnalogInStatusSample",
@@ -529,10 +713,10 @@ _xdefine("FDwfAnalogInChannelRangeSteps",
 def FDwfAnalogInChannelRangeSteps(hdwf, rgVoltsStep=None, pnSteps=None):
     if rgVoltsStep is not None and pnSteps is not None:
         return _FDwfAnalogInChannelRangeSteps(hdwf, rgVoltsStep, pnSteps)
-    rgVoltsSteps = (c_double * 32)()
+    rgVoltsStep = (c_double * 32)()
     pnSteps = c_int()
     _FDwfAnalogInChannelRangeSteps(hdwf, rgVoltsStep, byref(pnSteps))
-    return tuple([ rgVoltSteps[i] for i in range(pnSteps.value) ])
+    return tuple([ rgVoltsStep[i] for i in range(pnSteps.value) ])
 #  FDwfAnalogInChannelRangeSet(HDWF hdwf, int idxChannel, double voltsRange);
 _define("FDwfAnalogInChannelRangeSet",
         (HDWF, c_int, c_double,),
@@ -970,13 +1154,10 @@ _xdefine("FDwfAnalogOutNodeDataSet",
          (HDWF, c_int, AnalogOutNode, POINTER(c_double), c_int,),
          ((_ARGIN, "hdwf"), (_ARGIN, "idxChannel"), (_ARGIN, "node"),
           (_ARGIN, "rgdData"), (_ARGIN, "cdData"), ))
+# rgdData: float64 buffer (numpy.ndarray, array('d') ...) is passed without
+#  copy, others (list, other dtypes) are converted
 def FDwfAnalogOutNodeDataSet(hdwf, idxChannel, node, rgdData, cdData=None):
-    if cdData is not None:
-        return _FDwfAnalogOutNodeDataSet(
-            hdwf, idxChannel, node, rgdData, cdData)
-    cdData = len(rgdData)
-    rgdData_ = (c_double * cdData)()
-    for i, v in enumerate(rgdData): rgdData_[i] = rgdData[i]
+    rgdData_, cdData = _in_buffer(rgdData, c_double, cdData)
     return _FDwfAnalogOutNodeDataSet(hdwf, idxChannel, node, rgdData_, cdData)
 
 # needed for EExplorer, don't care for ADiscovery
@@ -1013,13 +1194,9 @@ _xdefine("FDwfAnalogOutNodePlayData",
          (HDWF, c_int, AnalogOutNode, POINTER(c_double), c_int,),
          ((_ARGIN, "hdwf"), (_ARGIN, "idxChannel"), (_ARGIN, "node"),
           (_ARGIN, "rgdData"), (_ARGIN, "cdData"),))
+# rgdData: same as FDwfAnalogOutNodeDataSet()
 def FDwfAnalogOutNodePlayData(hdwf, idxChannel, node, rgdData, cdData=None):
-    if cdData is not None:
-        return _FDwfAnalogOutNodePlayData(
-            hdwf, idxChannel, node, rgdData, cdData)
-    cdData = len(rgdData)
-    rgdData_ = (c_double * cdData)()
-    for i, v in enumerate(rgdData): rgdData_[i] = rgdData[i]
+    rgdData_, cdData = _in_buffer(rgdData, c_double, cdData)
     return _FDwfAnalogOutNodePlayData(hdwf, idxChannel, node, rgdData_, cdData)
 
 # ANALOG IO INSTRUMENT FUNCTIONS
@@ -1198,13 +1375,24 @@ _define("FDwfDigitalInStatusAutoTriggered",
 _xdefine("FDwfDigitalInStatusData",
          (HDWF, POINTER(c_ubyte), c_int,),
          ((_ARGIN, "hdwf"), (_ARGIN, "rgData"), (_ARGIN, "countOfDataBytes"),))
-def FDwfDigitalInStatusData(hdwf, rgData_or_count, countOfDataBytes=None):
+def FDwfDigitalInStatusData(hdwf, rgData_or_count=None, countOfDataBytes=None,
+                            out=None, as_array=False):
     if countOfDataBytes is not None:
         return _FDwfDigitalInStatusData(hdwf, rgData_or_count, countOfDataBytes)
     countOfDataBytes = rgData_or_count
+    if out is not None:
+        if countOfDataBytes is None: countOfDataBytes = memoryview(out).nbytes
+        _FDwfDigitalInStatusData(
+            hdwf, (c_ubyte * countOfDataBytes).from_buffer(out),
+            countOfDataBytes)
+        return out
     rgData = (c_ubyte * countOfDataBytes)()
     _FDwfDigitalInStatusData(hdwf, rgData, countOfDataBytes)
-    return tuple([ rgData[i] for i in range(countOfDataBytes) ])
+    if as_array:
+        return _as_array(rgData)
+    return tuple(rgData)
+# out: contiguous writable buffer to fill with raw bytes
+# as_array: return numpy.ndarray (or memoryview) sharing the read buffer
 #  FDwfDigitalInStatusRecord(HDWF hdwf, int *pcdDataAvailable, int *pcdDataLost, int *pcdDataCorrupt);
 _define("FDwfDigitalInStatusRecord",
         (HDWF, POINTER(c_int), POINTER(c_int), POINTER(c_int),),
@@ -1552,43 +1740,24 @@ _xdefine("FDwfDigitalOutDataSet",
          (HDWF, c_int, POINTER(c_ubyte), c_uint,),
          ((_ARGIN, "hdwf"), (_ARGIN, "idxChannel"),
           (_ARGIN, "rgBits"), (_ARGIN, "countOfBits"),))
+# rgBits: packed bits (bytes, bytearray, memoryview, or ctypes array or
+#  pointer with countOfBits), or sequence of truth values (list,
+#  numpy.ndarray of bool or uint8 ...), or sequence of tuple; countOfBits
+#  limits the count of bits of a sequence
 def FDwfDigitalOutDataSet(hdwf, idxChannel, rgBits, countOfBits=None):
-    if countOfBits is not None:
-        return _FDwfDigitalOutDataSet(hdwf, idxChannel, rgBits, countOfBits)
-    if type(rgBits[0]) is tuple: #rgBits is sequence of tuple
-        countOfBits = len(rgBits)*2
-        rgBits_ = (c_ubyte * ((countObBits + 7)// 8))()
-        index = 0
-        byte = 0x00
-        mask = 0x01
-        for io, oe in rgBits:
-            if io: byte |= mask
-            mask <<= 1
-            if oe: byte |= mask
-            mask <<= 1
-            if mask > 0x80:
-                rgBits_[index] = byte
-                mask = 0x01
-                byte = 0x00
-                index += 1
-        if index != len(rgBits_):
-            rgBits_[index] = byte
+    if isinstance(rgBits, (bytes, bytearray, memoryview)):
+        rgBits_ = _byte_buffer(rgBits)
+        if countOfBits is None:
+            countOfBits = getattr(rgBits, "countOfBits", len(rgBits_) * 8)
+    elif isinstance(rgBits, (Array, _Pointer)) and countOfBits is not None:
+        rgBits_ = rgBits # packed bits
     else:
-        countOfBits = len(rgBits)
-        rgBits_ = (c_ubyte * ((countOfBits + 7)// 8))()
-        index = 0
-        byte = 0x00
-        mask = 0x01
-        for io in rgBits:
-            if io: byte |= mask
-            mask <<= 1
-            if mask > 0x80:
-                rgBits_[index] = byte
-                mask = 0x01
-                byte = 0x00
-                index += 1
-        if index != len(rgBits_):
-            rgBits_[index] = byte
+        rgBits_, count = _pack_bits(rgBits)
+        if countOfBits is None:
+            countOfBits = count
+        elif countOfBits > count:
+            raise ValueError("count of data is %d, but %d" %
+                             (count, countOfBits))
     return _FDwfDigitalOutDataSet(hdwf, idxChannel, rgBits_, countOfBits)
 # bits order is lsb first
 #  for TS output the count of bits its the total number of IO|OE bits,
@@ -1600,6 +1769,87 @@ def FDwfDigitalOutDataSet(hdwf, idxChannel, rgBits, countOfBits=None):
 # [ (IO, OE), (IO, OE) ... (IO, OE) ]
 
 # FDwfDigitalOutDataSet support functions
+class PackedBits(bytearray):
+    '''Bits packed lsb first for FDwfDigitalOutDataSet(); countOfBits is
+    the count of valid bits'''
+    def __init__(self, countOfBits):
+        bytearray.__init__(self, (countOfBits + 7) // 8)
+        self.countOfBits = countOfBits
+
+_ENCODE_BLOCK = 1 << 16 # words per block, multiple of 8
+
+def _unpack_words(words, bits, msb_first):
+    # array of shape (len(words), bits); column j is bit j of the words
+    # (bit bits-1-j if msb_first)
+    np = _numpy()
+    values = np.asarray(words)
+    if values.dtype.kind not in 'biu': # python ints above 2**63
+        values = np.array([ int(v) & 0xffffffffffffffff for v in words ],
+                         dtype=np.uint64)
+    octets = values.astype('<u8').view(np.uint8)
+    planes = np.unpackbits(octets.reshape(-1, 8), axis=1,
+                           bitorder='little')[:, :bits]
+    if msb_first:
+        planes = planes[:, ::-1]
+    return planes
+
+def _reverse_bits(v, bits):
+    return int(format(v, '0%db' % bits)[::-1], 2)
+
+def encode_bitdata_stream(data, bits, msb_first=False):
+    '''Packs words of data to a stream of bits per word, for
+    FDwfDigitalOutDataSet()'''
+    out = PackedBits(len(data) * bits)
+    np = _numpy()
+    if np is not None and bits <= 64:
+        packed = np.frombuffer(out, dtype=np.uint8)
+        for start in range(0, len(data), _ENCODE_BLOCK):
+            planes = _unpack_words(data[start:start + _ENCODE_BLOCK],
+                                   bits, msb_first)
+            chunk = np.packbits(planes.ravel(), bitorder='little')
+            pos = start * bits // 8
+            packed[pos:pos + len(chunk)] = chunk
+        return out
+    mask = (1 << bits) - 1
+    acc, count, pos = 0, 0, 0
+    for v in data:
+        v = int(v) & mask
+        if msb_first:
+            v = _reverse_bits(v, bits)
+        acc |= v << count
+        count += bits
+        while count >= 8:
+            out[pos] = acc & 0xff
+            acc >>= 8
+            count -= 8
+            pos += 1
+    if count:
+        out[pos] = acc
+    return out
+
+def encode_bus_bitdata_streams(data, bits):
+    '''Packs bit i of words of data to the stream of channel i; returns
+    tuple of bits streams for FDwfDigitalOutDataSet()'''
+    outs = tuple([ PackedBits(len(data)) for i in range(bits) ])
+    np = _numpy()
+    if np is not None and bits <= 64:
+        packed = [ np.frombuffer(out, dtype=np.uint8) for out in outs ]
+        for start in range(0, len(data), _ENCODE_BLOCK):
+            planes = _unpack_words(data[start:start + _ENCODE_BLOCK],
+                                   bits, False)
+            chunk = np.packbits(planes.T, axis=1, bitorder='little')
+            pos = start // 8
+            for i in range(bits):
+                packed[i][pos:pos + chunk.shape[1]] = chunk[i]
+        return outs
+    for n, v in enumerate(data):
+        v = int(v)
+        for i in range(bits):
+            if (v >> i) & 1:
+                outs[i][n >> 3] |= 1 << (n & 7)
+    return outs
+
+# lists of bool, kept for compatibility; encode_*() are faster
 def create_bitdata_stream(data, bits, msb_first=False):
     result = []
     for v in data:
@@ -1745,12 +1995,8 @@ _xdefine("FDwfAnalogOutPlayData",
          ((_ARGIN, "hdwf"), (_ARGIN, "idxChannel"),
           (_ARGIN, "rgdData"), (_ARGIN, "cdData"),))
 def FDwfAnalogOutPlayData(hdwf, idxChannel, rgdData, cdData=None):
-    if cdData is not None:
-        return _FDwfAnalogOutPlayData(hdwf, idxChannel, rgdData, cdData)
-    cdData = len(rgdData)
-    rgdData_ = (c_double * cdData)()
-    for i, v in enumerate(cdData): rgdData_[i] = rgdData[i]
-    return _FDwfAnalogOutPlayData(hdwf, idxChannel, rgdData, cdData)
+    rgdData_, cdData = _in_buffer(rgdData, c_double, cdData)
+    return _FDwfAnalogOutPlayData(hdwf, idxChannel, rgdData_, cdData)
 #  FDwfEnumAnalogInChannels(int idxDevice, int *pnChannels);
 _define("FDwfEnumAnalogInChannels",
         (c_int, POINTER(c_int),),
@@ -0,0 +1,261 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+'''
+===========================================
+Digilent's DWF library wrapper for python.
+===========================================
+
+Play mode streaming for DwfAnalogOut.
+
+A DwfPlayStream feeds samples to a channel in funcPlay mode on a
+dedicated thread.  The device buffer is prefilled by nodeDataSet(),
+and after the start it is topped up by nodePlayData() with as many
+samples as nodePlayStatus() reports free.  Samples are normalized to
+-1..1 and scaled by the amplitude of the node, as custom data.
+
+  dwf_ao.nodeFunctionSet(0, dwf_ao.NODE.CARRIER, dwf_ao.FUNC.PLAY)
+  dwf_ao.nodeFrequencySet(0, dwf_ao.NODE.CARRIER, 48000.0)
+  play = dwf_ao.play_stream(0, "sound.wav")
+  play.wait()
+  print(play.metrics())
+
+The source is an array (anything sliceable with len()), an iterator
+which yields arrays of samples, or a path of a WAV (PCM 8/16/32 bits
+or float) or raw float64 file, which is memory mapped.
+'''
+
+import array
+import mmap
+import struct
+import threading
+import time
+
+from . import lowlevel as _l
+
+class _Samples(object):
+    '''Sliceable samples of memory mapped data, normalized to float'''
+    def __init__(self, data, scale=1.0, offset=0.0, mapped=None):
+        self.data = data
+        self.scale = scale
+        self.offset = offset
+        self._mapped = mapped # keeps mmap alive
+    def __len__(self):
+        return len(self.data)
+    def __getitem__(self, index):
+        data = self.data[index]
+        if self.scale == 1.0 and self.offset == 0.0:
+            return data
+        if _l._numpy() is not None:
+            return (data - self.offset) * (1.0 / self.scale)
+        return array.array(
+            'd', [ (v - self.offset) / self.scale for v in data ])
+
+def _map(path, typecode, offset=0, count=None):
+    # memory mapped array of typecode ('d', 'h' ...) in file of path
+    np = _l._numpy()
+    if np is not None:
+        return np.memmap(path, dtype='<' + typecode, mode='r',
+                         offset=offset, shape=count), None
+    f = open(path, 'rb')
+    try:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    finally:
+        f.close()
+    size = array.array(typecode).itemsize
+    if count is None:
+        count = (len(mapped) - offset) // size
+    view = memoryview(mapped)[offset:offset + count * size]
+    return view.cast(typecode), mapped
+
+def open_raw(path, typecode='d'):
+    '''Memory maps samples of a raw little-endian file; samples are
+    passed as they are'''
+    data, mapped = _map(path, typecode)
+    return _Samples(data, mapped=mapped)
+
+_WAVE_FORMATS = {
+    (1, 8): ('B', 128.0, 128.0),
+    (1, 16): ('h', 32768.0, 0.0),
+    (1, 32): ('i', 2147483648.0, 0.0),
+    (3, 32): ('f', 1.0, 0.0),
+    (3, 64): ('d', 1.0, 0.0),
+    }
+
+def open_wave(path, channel=0):
+    '''Memory maps samples of channel of a WAV file, normalized to -1..1'''
+    f = open(path, 'rb')
+    try:
+        riff, size, wave = struct.unpack('<4sI4s', f.read(12))
+        if riff != b'RIFF' or wave != b'WAVE':
+            raise ValueError("%s is not a WAV file" % path)
+        fmt = None
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                raise ValueError("%s has no data" % path)
+            name, size = struct.unpack('<4sI', header)
+            if name == b'fmt ':
+                fmt = f.read(size + (size & 1))
+            elif name == b'data':
+                offset = f.tell()
+                break
+            else:
+                f.seek(size + (size & 1), 1)
+    finally:
+        f.close()
+    if fmt is None:
+        raise ValueError("%s has no format" % path)
+    tag, channels, rate, byterate, align, bits = \
+        struct.unpack('<HHIIHH', fmt[:16])
+    if tag == 0xfffe and len(fmt) >= 26: # WAVE_FORMAT_EXTENSIBLE
+        tag = struct.unpack('<H', fmt[24:26])[0]
+    if (tag, bits) not in _WAVE_FORMATS:
+        raise ValueError("unsupported WAV format: %d, %d bits" % (tag, bits))
+    typecode, scale, zero = _WAVE_FORMATS[(tag, bits)]
+    frames = size // align
+    data, mapped = _map(path, typecode, offset, frames * channels)
+    if channels > 1:
+        data = data[channel::channels]
+    return _Samples(data, scale, zero, mapped)
+
+def _chunks(source, chunk):
+    # iterator of arrays of samples
+    if isinstance(source, str):
+        if source.lower().endswith('.wav'):
+            source = open_wave(source)
+        else:
+            source = open_raw(source)
+    if hasattr(source, '__len__') and hasattr(source, '__getitem__'):
+        for start in range(0, len(source), chunk):
+            yield source[start:start + chunk]
+    else:
+        for data in source:
+            yield data
+
+def _concatenate(parts):
+    if len(parts) == 1:
+        return parts[0]
+    np = _l._numpy()
+    if np is not None:
+        return np.concatenate(
+            [ np.asarray(part, dtype=float) for part in parts ])
+    data = array.array('d')
+    for part in parts:
+        data.extend(array.array('d', part))
+    return data
+
+class DwfPlayStream(threading.Thread):
+    '''Feeds samples of source to idxChannel of DwfAnalogOut in play mode.
+
+    prefill samples (default: maximum of nodeDataInfo()) are set before
+    the start, then at most chunk samples are written per nodePlayData().
+    lost and corrupted are counted by the device; underruns is the
+    count of polls in which the device reported lost samples.  With
+    drain, the device is polled after the end of the source until its
+    buffer is played out, the channel is done or stop() is called.'''
+    def __init__(self, instrument, idxChannel, source, chunk=4096,
+                 prefill=None, node=None, poll_interval=0.001, start=True,
+                 drain=True):
+        threading.Thread.__init__(self)
+        self.daemon = True
+        self.instrument = instrument
+        self.idxChannel = idxChannel
+        if node is None:
+            node = instrument.NODE.CARRIER
+        self.node = node
+        self.chunk = chunk
+        self.prefill = prefill
+        self.poll_interval = poll_interval
+        self.drain = drain
+        self.samples = 0
+        self.lost = 0
+        self.corrupted = 0
+        self.underruns = 0
+        self.polls = 0
+        self.error = None
+        self._chunks = _chunks(source, chunk)
+        self._pending = None
+        self._start = start
+        self._stopping = threading.Event()
+
+    def _take(self, count):
+        # at most count samples from the source, None at the end
+        while self._pending is None or len(self._pending) == 0:
+            self._pending = next(self._chunks, None)
+            if self._pending is None:
+                return None
+        data = self._pending
+        if len(data) > count:
+            self._pending = data[count:]
+            return data[:count]
+        self._pending = None
+        return data
+
+    def run(self):
+        try:
+            self._play()
+        except Exception as e:
+            self.error = e
+
+    def _play(self):
+        ao, ch, node = self.instrument, self.idxChannel, self.node
+        size = ao.nodeDataInfo(ch, node)[1]
+        if self.prefill is None:
+            self.prefill = size
+        parts = []
+        filled = 0
+        while filled < self.prefill:
+            data = self._take(self.prefill - filled)
+            if data is None:
+                break
+            parts.append(data)
+            filled += len(data)
+        if parts:
+            ao.nodeDataSet(ch, node, _concatenate(parts))
+            self.samples += filled
+        if self._start:
+            ao.configure(ch, True)
+        end = False # of the source
+        while not self._stopping.is_set():
+            if ao.status(ch) == ao.STATE.DONE:
+                break
+            free, lost, corrupted = ao.nodePlayStatus(ch, node)
+            self.polls += 1
+            self.lost += lost
+            self.corrupted += corrupted
+            if lost:
+                self.underruns += 1
+            if end and free >= size:
+                break # played out
+            while free > 0 and not end:
+                data = self._take(min(free, self.chunk))
+                if data is None:
+                    end = True
+                    if not self.drain:
+                        return
+                    break
+                ao.nodePlayData(ch, node, data)
+                self.samples += len(data)
+                free -= len(data)
+            time.sleep(self.poll_interval)
+
+    def stop(self, timeout=None):
+        '''Stops feeding; the output is not stopped'''
+        self._stopping.set()
+        if self.is_alive():
+            self.join(timeout)
+
+    def wait(self, timeout=None):
+        '''Waits until all samples are fed (and played, with drain), and
+        raises error of the thread'''
+        self.join(timeout)
+        if self.error is not None:
+            raise self.error
+
+    def metrics(self):
+        return { 'samples': self.samples,
+                 'lost': self.lost,
+                 'corrupted': self.corrupted,
+                 'underruns': self.underruns,
+                 'polls': self.polls }
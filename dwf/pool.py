@@ -0,0 +1,230 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+'''
+===========================================
+Digilent's DWF library wrapper for python.
+===========================================
+
+Several devices opened in parallel, and synchronized acquisitions.
+
+DwfDevicePool opens devices on one thread per device, since
+FDwfDeviceOpen() takes about a second per device.  Instruments are
+armed in parallel, waiting for a trigger source, and started together:
+
+  pool = DwfDevicePool(['210321A1B2C3', '210321A1B2C4'], DwfAnalogIn)
+  pool.open()
+  pool.apply(cfg)
+  pool.arm()              # trigger source PC
+  pool.start()            # FDwfDeviceTriggerPC() on each device at once
+  data = pool.results()   # { SN: samples }
+  print(pool.metrics())
+
+With a trigger line wired between the devices, the master device drives
+it by its PC trigger, and the other devices wait for the line; start()
+is then a single FDwfDeviceTriggerPC() on the master:
+
+  pool.arm(Dwf.TRIGSRC.EXTERNAL1, master='210321A1B2C3', pin=0)
+  pool.start()
+
+Devices are keyed by serial number without 'SN:'.
+'''
+
+import threading
+import time
+
+from .api import (Dwf, DwfAnalogIn, DwfAnalogOut, DwfDigitalIn,
+                  DwfEnumSnapshot, _normalize_sn)
+
+def _parallel(func, items):
+    # calls func(key, value) for items on a thread each; returns
+    # ({ key: result }, { key: exception })
+    results = {}
+    errors = {}
+    def run(key, value):
+        try:
+            results[key] = func(key, value)
+        except Exception as e:
+            errors[key] = e
+    threads = [ threading.Thread(target=run, args=item) for item in items ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, errors
+
+def _raise(errors, action):
+    if errors:
+        raise RuntimeError("%s failed: %s" % (action, '; '.join(
+            [ '%s: %s' % (sn, errors[sn]) for sn in sorted(errors) ])))
+
+def _status(instrument):
+    if isinstance(instrument, (DwfAnalogIn, DwfDigitalIn)):
+        return instrument.status(True)
+    if isinstance(instrument, DwfAnalogOut):
+        return instrument.status(-1)
+    return instrument.status()
+
+def _configure(instrument):
+    # starts the instrument, which then waits for its trigger
+    if isinstance(instrument, (DwfAnalogIn, DwfDigitalIn)):
+        instrument.configure(False, True)
+    elif isinstance(instrument, DwfAnalogOut):
+        instrument.configure(-1, True)
+    else:
+        instrument.configure(True)
+
+def _trigger_source(instrument, trigsrc):
+    if isinstance(instrument, DwfAnalogOut):
+        instrument.triggerSourceSet(-1, trigsrc)
+    else:
+        instrument.triggerSourceSet(trigsrc)
+
+_WAITING = (Dwf.STATE.ARMED, Dwf.STATE.WAIT, Dwf.STATE.TRIGGERED,
+            Dwf.STATE.RUNNING, Dwf.STATE.DONE)
+
+class DwfDevicePool(object):
+    '''Devices of serial numbers sn_list (default: all devices which are
+    not opened) as instruments of cls'''
+    def __init__(self, sn_list=None, cls=Dwf, idxCfg=None,
+                 enumeration=None):
+        self.cls = cls
+        self.idxCfg = idxCfg
+        self.enumeration = enumeration or DwfEnumSnapshot()
+        if sn_list is not None:
+            sn_list = [ _normalize_sn(sn) for sn in sn_list ]
+        self.sn_list = sn_list
+        self.devices = {}
+        self.open_latency = {}
+        self.arm_latency = {}
+        self.start_times = {}
+        self.master = None
+
+    def open(self):
+        '''Opens devices in parallel; raises RuntimeError if some are
+        not opened, and keeps the others'''
+        self.enumeration.refresh(force=True)
+        if self.sn_list is None:
+            self.sn_list = [ _normalize_sn(e.SN)
+                             for e in self.enumeration if not e.opened ]
+        entries = []
+        for sn in self.sn_list:
+            entry = self.enumeration.bySN(sn)
+            if entry is None:
+                raise RuntimeError("Device %s is not found" % sn)
+            entries.append((sn, entry.idxDevice))
+        def open_device(sn, idxDevice):
+            start = time.time()
+            device = self.cls(idxDevice, self.idxCfg)
+            self.open_latency[sn] = time.time() - start
+            return device
+        devices, errors = _parallel(open_device, entries)
+        self.devices.update(devices)
+        _raise(errors, "open")
+
+    def _run(self, action, func, *args):
+        results, errors = _parallel(
+            lambda sn, device: func(device, *args), self.devices.items())
+        _raise(errors, action)
+        return results
+
+    def run(self, func, *args):
+        '''Calls func(instrument, *args) for each device in parallel;
+        returns { SN: result }'''
+        return self._run(getattr(func, '__name__', 'run'), func, *args)
+
+    def apply(self, cfg):
+        '''apply() of DwfConfig cfg on each device'''
+        return self._run('apply', lambda device: device.apply(cfg))
+
+    def arm(self, trigsrc=Dwf.TRIGSRC.PC, master=None, pin=0,
+            timeout=5.0):
+        '''Sets trigger sources and starts instruments in parallel, then
+        waits until all wait for the trigger.  With master, the master
+        device drives trigger pin by its PC trigger, and its instrument
+        is triggered by PC; trigsrc is then the trigger line of the
+        other devices, and must not be PC.'''
+        if master is not None:
+            master = _normalize_sn(master)
+            if master not in self.devices:
+                raise ValueError("Device %s is not in the pool" % master)
+            if trigsrc == Dwf.TRIGSRC.PC:
+                raise ValueError("trigsrc of the devices other than the "
+                                 "master must be a trigger line, not PC")
+        self.master = master
+        def arm_device(sn, device):
+            start = time.time()
+            if sn == self.master:
+                Dwf.triggerSet(device, pin, Dwf.TRIGSRC.PC)
+                _trigger_source(device, Dwf.TRIGSRC.PC)
+            else:
+                _trigger_source(device, trigsrc)
+            _configure(device)
+            while _status(device) not in _WAITING:
+                if time.time() - start > timeout:
+                    raise RuntimeError("Device %s is not armed" % sn)
+                time.sleep(0.0005)
+            self.arm_latency[sn] = time.time() - start
+        _raise(_parallel(arm_device, self.devices.items())[1], "arm")
+
+    def start(self):
+        '''Triggers the armed devices: FDwfDeviceTriggerPC() on the master,
+        or on all devices released together from their threads'''
+        self.start_times = {}
+        if self.master is not None:
+            self.devices[self.master].triggerPC()
+            self.start_times[self.master] = time.time()
+            return
+        ready = threading.Semaphore(0)
+        go = threading.Event()
+        def trigger(sn, device):
+            ready.release()
+            go.wait()
+            device.triggerPC()
+            self.start_times[sn] = time.time()
+        done = []
+        thread = threading.Thread(target=lambda: done.append(
+            _parallel(trigger, self.devices.items())))
+        thread.start()
+        for i in range(len(self.devices)):
+            ready.acquire()
+        go.set()
+        thread.join()
+        _raise(done[0][1], "start")
+
+    def skew(self):
+        '''Spread of the host times at which triggers were sent; None
+        with a master device, whose trigger line is not measured'''
+        if self.master is not None or not self.start_times:
+            return None
+        times = self.start_times.values()
+        return max(times) - min(times)
+
+    def results(self, channels=None, timeout=None, poll_interval=0.001):
+        '''Waits until acquisitions of DwfAnalogIn / DwfDigitalIn are
+        done, and returns { SN: samples } as acquire() of them'''
+        def read(device):
+            start = time.time()
+            while device.status(True) != device.STATE.DONE:
+                if timeout is not None and time.time() - start > timeout:
+                    raise RuntimeError("acquisition is not done")
+                time.sleep(poll_interval)
+            count = device.statusSamplesValid()
+            if isinstance(device, DwfAnalogIn):
+                return device.statusDataAll(count, channels=channels)
+            return device.statusData(count)
+        return self._run('results', read)
+
+    def metrics(self):
+        return { 'open_latency': dict(self.open_latency),
+                 'arm_latency': dict(self.arm_latency),
+                 'skew': self.skew() }
+
+    def close(self):
+        for device in self.devices.values():
+            device.close()
+        self.devices = {}
+    def __enter__(self):
+        return self
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,160 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+'''
+===========================================
+Digilent's DWF library wrapper for python.
+===========================================
+
+Streaming reducers over record mode chunks (numpy is required).
+
+Each stage reduces chunks of shape (rows, n) or (n,) by factor, and
+carries the samples of an incomplete block to the next chunk.  Results
+are views of buffers of the stage, which are reused by the next feed();
+copy them to keep.  Buffers grow only when a chunk is larger than ever
+before, so a stream of chunks of the same size allocates nothing.
+
+  average = BlockAverage(16)
+  envelope = MinMax(1024)
+  cic = Chain(CicDecimator(8, stages=3), Decimate(4))
+  for chunk in dwf_ai.record(chunk=65536):
+      a = average.feed(chunk)
+      low, high = envelope.feed(chunk)
+      c = cic.feed(chunk)
+'''
+
+from .lowlevel import _numpy
+
+_np = _numpy()
+if _np is None:
+    raise ImportError("dwf.reduce needs numpy")
+
+def _rows(chunk):
+    chunk = _np.asarray(chunk)
+    return chunk.reshape(1, -1) if chunk.ndim == 1 else chunk
+
+class _Buffer(object):
+    # float64 buffer of (rows, size) or more, reused for each chunk
+    def __init__(self):
+        self._buf = _np.zeros((0, 0))
+    def get(self, rows, size):
+        if self._buf.shape[0] != rows or self._buf.shape[1] < size:
+            self._buf = _np.zeros((rows, max(size, self._buf.shape[1])))
+        return self._buf[:, :size]
+
+class _BlockReducer(object):
+    '''Reduces blocks of factor samples by ufunc reductions'''
+    ufuncs = ()
+    def __init__(self, factor):
+        self.factor = factor
+        self._rest = _Buffer()
+        self._outs = [ _Buffer() for ufunc in self.ufuncs ]
+        self._count = 0 # samples in rest
+
+    def _reduce(self, ufunc, blocks, out):
+        ufunc.reduce(blocks, axis=2, out=out)
+
+    def feed(self, chunk):
+        x = _rows(chunk)
+        rows, n = x.shape
+        rest = self._rest.get(rows, self.factor)
+        count = (self._count + n) // self.factor
+        outs = [ buf.get(rows, count) for buf in self._outs ]
+        pos = 0
+        if self._count and count:
+            # complete the block of rest by the head of chunk
+            pos = self.factor - self._count
+            rest[:, self._count:] = x[:, :pos]
+            blocks = rest.reshape(rows, 1, self.factor)
+            for ufunc, out in zip(self.ufuncs, outs):
+                self._reduce(ufunc, blocks, out[:, :1])
+            self._count = 0
+        done = 1 if pos else 0
+        full = (n - pos) // self.factor * self.factor
+        blocks = x[:, pos:pos + full].reshape(rows, -1, self.factor)
+        for ufunc, out in zip(self.ufuncs, outs):
+            self._reduce(ufunc, blocks, out[:, done:])
+        left = n - pos - full
+        rest[:, self._count:self._count + left] = x[:, pos + full:]
+        self._count += left
+        return self._result(outs, _np.asarray(chunk).ndim)
+
+    def _result(self, outs, ndim):
+        if ndim == 1:
+            outs = [ out[0] for out in outs ]
+        return outs[0] if len(outs) == 1 else tuple(outs)
+
+class BlockAverage(_BlockReducer):
+    '''Mean of each block of factor samples'''
+    ufuncs = (_np.add,)
+    def _reduce(self, ufunc, blocks, out):
+        ufunc.reduce(blocks, axis=2, dtype=_np.float64, out=out)
+        out *= 1.0 / self.factor
+
+class MinMax(_BlockReducer):
+    '''Envelope: (minimum, maximum) of each block of factor samples'''
+    ufuncs = (_np.minimum, _np.maximum)
+
+class Decimate(object):
+    '''Every factor-th sample, from the first sample of the stream'''
+    def __init__(self, factor):
+        self.factor = factor
+        self._out = _Buffer()
+        self._phase = 0 # index of the next sample in the next chunk
+
+    def feed(self, chunk):
+        x = _rows(chunk)
+        rows, n = x.shape
+        picked = x[:, self._phase::self.factor]
+        out = self._out.get(rows, picked.shape[1])
+        out[...] = picked
+        self._phase = (self._phase - n) % self.factor
+        return out[0] if _np.asarray(chunk).ndim == 1 else out
+
+class CicDecimator(object):
+    '''CIC-style decimator: stages of moving sums of factor samples, then
+    every factor-th sample, normalized to the gain of 1.  Moving sums are
+    differences of cumulative sums within a chunk, which do not grow
+    over the stream as integrators of a CIC filter do.'''
+    def __init__(self, factor, stages=3):
+        self.factor = factor
+        self.stages = stages
+        self._history = [ _Buffer() for i in range(stages) ]
+        self._sums = _Buffer()
+        self._work = [ _Buffer(), _Buffer() ]
+        self._decimate = Decimate(factor)
+        self._started = False
+
+    def feed(self, chunk):
+        x = _rows(chunk)
+        rows, n = x.shape
+        keep = self.factor - 1
+        if not self._started:
+            for history in self._history:
+                history.get(rows, keep)[...] = 0.0
+            self._started = True
+        y = x
+        for i, history in enumerate(self._history):
+            h = history.get(rows, keep)
+            sums = self._sums.get(rows, keep + n + 1)
+            sums[:, 0] = 0.0
+            sums[:, 1:keep + 1] = h
+            sums[:, keep + 1:] = y
+            # shift the history before overwriting it by cumulative sums
+            h[...] = sums[:, n + 1:]
+            _np.cumsum(sums[:, 1:], axis=1, out=sums[:, 1:])
+            out = self._work[i % 2].get(rows, n)
+            _np.subtract(sums[:, self.factor:], sums[:, :n], out=out)
+            y = out
+        y *= 1.0 / self.factor ** self.stages
+        out = self._decimate.feed(y)
+        return out[0] if _np.asarray(chunk).ndim == 1 else out
+
+class Chain(object):
+    '''Feeds the result of each stage to the next one'''
+    def __init__(self, *stages):
+        self.stages = stages
+    def feed(self, chunk):
+        for stage in self.stages:
+            chunk = stage.feed(chunk)
+        return chunk
@@ -0,0 +1,188 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+'''
+===========================================
+Digilent's DWF library wrapper for python.
+===========================================
+
+Transition (run-length) encoding of DwfDigitalIn samples.
+
+Samples of a logic analyzer rarely change, so they are kept as
+transition records (index, value): the value from index until the next
+transition.  The first sample is always a transition.
+
+  transitions = Transitions.encode(samples)
+  samples = transitions.decode(1000, 2000)
+
+  encoder = TransitionEncoder()
+  for chunk in dwf_di.record():
+      indices, values = encoder.feed(chunk)
+  edges = encoder.transitions.edges(mask=0x0001)
+
+Indices are counted over the samples fed to the encoder; samples lost by
+the device (record.lost) are not counted.
+'''
+
+import array
+import bisect
+
+from . import lowlevel as _l
+
+def encode_transitions(samples, start=0, previous=None):
+    '''Returns (indices, values) of transitions of samples, which start at
+    index start; previous is the value before them, if known'''
+    np = _l._numpy()
+    if np is not None:
+        samples = np.asarray(samples)
+        if len(samples) == 0:
+            return (np.zeros(0, dtype=np.int64),
+                    samples[:0].copy())
+        change = np.flatnonzero(samples[1:] != samples[:-1]) + 1
+        if previous is None or samples[0] != previous:
+            change = np.concatenate(
+                [ np.zeros(1, dtype=change.dtype), change ])
+        return change.astype(np.int64) + start, samples[change]
+    indices = array.array('q')
+    values = []
+    for i, v in enumerate(samples):
+        if v != previous:
+            indices.append(start + i)
+            values.append(v)
+            previous = v
+    return indices, values
+
+class Transitions(object):
+    '''Transition records of count samples; transitions are appended in
+    order, and looked up by binary search'''
+    def __init__(self):
+        self.count = 0
+        self._parts = []
+        self._indices = self._values = None
+
+    @classmethod
+    def encode(cls, samples):
+        transitions = cls()
+        indices, values = encode_transitions(samples)
+        transitions.append(indices, values, len(samples))
+        return transitions
+
+    def append(self, indices, values, count=None):
+        '''Appends transitions; count is the count of samples after them'''
+        if len(indices):
+            self._parts.append((indices, values))
+            self._indices = self._values = None
+            self.count = indices[-1] + 1
+        if count is not None:
+            self.count = count
+
+    def __len__(self):
+        return len(self.arrays()[0])
+
+    def arrays(self):
+        '''Returns (indices, values) of all transitions'''
+        if self._indices is None:
+            np = _l._numpy()
+            if np is not None:
+                if self._parts:
+                    self._indices = np.concatenate(
+                        [ p[0] for p in self._parts ])
+                    self._values = np.concatenate(
+                        [ p[1] for p in self._parts ])
+                else:
+                    self._indices = np.zeros(0, dtype=np.int64)
+                    self._values = np.zeros(0, dtype=np.uint32)
+            else:
+                self._indices = array.array('q')
+                self._values = []
+                for indices, values in self._parts:
+                    self._indices.extend(indices)
+                    self._values.extend(values)
+            self._parts = [ (self._indices, self._values) ]
+        return self._indices, self._values
+
+    def _check(self, start, stop):
+        indices = self.arrays()[0]
+        if start < stop and (not len(indices) or start < indices[0] or
+                             stop > self.count):
+            raise IndexError("samples %d:%d are out of range" % (start, stop))
+
+    def value_at(self, index):
+        '''Returns the sample at index'''
+        self._check(index, index + 1)
+        indices, values = self.arrays()
+        return values[bisect.bisect_right(indices, index) - 1]
+
+    def decode(self, start=0, stop=None):
+        '''Returns samples of start:stop'''
+        if stop is None:
+            stop = self.count
+        self._check(start, stop)
+        indices, values = self.arrays()
+        np = _l._numpy()
+        if np is not None:
+            if start >= stop:
+                return values[:0].copy()
+            first = np.searchsorted(indices, start, 'right') - 1
+            last = np.searchsorted(indices, stop, 'left')
+            bounds = np.concatenate(
+                [ [start], indices[first + 1:last], [stop] ])
+            return np.repeat(values[first:last], np.diff(bounds))
+        samples = []
+        if start >= stop:
+            return samples
+        i = bisect.bisect_right(indices, start) - 1
+        while i < len(indices) and indices[i] < stop:
+            end = indices[i + 1] if i + 1 < len(indices) else stop
+            count = min(end, stop) - max(indices[i], start)
+            samples.extend([ values[i] ] * count)
+            i += 1
+        return samples
+
+    def edges(self, mask=None, start=0, stop=None):
+        '''Returns indices in start:stop where bits of mask change'''
+        if stop is None:
+            stop = self.count
+        indices, values = self.arrays()
+        np = _l._numpy()
+        if np is not None:
+            changed = values[1:] != values[:-1]
+            if mask is not None:
+                changed = ((values[1:] ^ values[:-1]) & mask) != 0
+            found = indices[1:][changed]
+            first, last = np.searchsorted(found, [ start, stop ])
+            return found[first:last]
+        found = array.array('q')
+        first = max(bisect.bisect_left(indices, start), 1)
+        last = bisect.bisect_left(indices, stop)
+        for i in range(first, last):
+            diff = values[i] ^ values[i - 1]
+            if mask is not None:
+                diff &= mask
+            if diff:
+                found.append(indices[i])
+        return found
+
+class TransitionEncoder(object):
+    '''Streaming stage: feed() encodes chunks of a record stream, and
+    appends them to transitions unless keep is False'''
+    def __init__(self, keep=True):
+        self.transitions = Transitions() if keep else None
+        self.samples = 0
+        self._previous = None
+
+    def feed(self, chunk):
+        '''Returns (indices, values) of transitions in chunk'''
+        indices, values = encode_transitions(
+            chunk, self.samples, self._previous)
+        if len(chunk):
+            self._previous = chunk[-1]
+        self.samples += len(chunk)
+        if self.transitions is not None:
+            self.transitions.append(indices, values, self.samples)
+        return indices, values
+
+    def __call__(self, chunks):
+        '''Generator of (indices, values) for chunks'''
+        for chunk in chunks:
+            yield self.feed(chunk)
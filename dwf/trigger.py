@@ -0,0 +1,224 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+'''
+===========================================
+Digilent's DWF library wrapper for python.
+===========================================
+
+Software trigger over record mode streams (numpy is required).
+
+SoftwareTrigger finds trigger events in a stream of samples of one
+channel, with the semantics of DwfAnalogIn.TRIGTYPE, TRIGCOND and
+TRIGLEN, and LEVEL in addition.  TriggerWindows cuts windows of pre
+samples before and post samples from each event out of the stream, so
+rare events are captured without keeping the whole stream.
+
+  trigger = SoftwareTrigger(1.5, TRIGTYPE.PULSE, TRIGCOND.RISING_POSITIVE,
+                            hysteresis=0.1, length=100, triglen=TRIGLEN.MORE)
+  windows = TriggerWindows(trigger, pre=1000, post=3000)
+  for chunk in dwf_ai.record(duration=3600):
+      for window in windows.feed(chunk):
+          print(window.index, window.data.shape)
+
+Conditions with hysteresis: for RISING_POSITIVE, the signal is high at
+level or above and low below level - hysteresis, and between them it
+keeps the previous state.  For FALLING_NEGATIVE, it is low at level or
+below and high above level + hysteresis.  The active state is high for
+RISING_POSITIVE, low for FALLING_NEGATIVE.
+
+  EDGE        the signal becomes active
+  LEVEL       the signal is active
+  PULSE       an active pulse ends shorter (LESS) or longer (MORE) than
+              length samples, or is active for length samples (TIMEOUT)
+  TRANSITION  the signal becomes active after length samples or less
+              (LESS) or more (MORE, TIMEOUT) in the hysteresis band
+
+The next event is not searched within holdoff samples after an event.
+Indices are counted over the samples fed.
+'''
+
+from collections import namedtuple
+
+from .lowlevel import _numpy
+from .api import DwfAnalogIn
+
+_np = _numpy()
+if _np is None:
+    raise ImportError("dwf.trigger needs numpy")
+
+TRIGTYPE = DwfAnalogIn.TRIGTYPE
+TRIGCOND = DwfAnalogIn.TRIGCOND
+TRIGLEN = DwfAnalogIn.TRIGLEN
+LEVEL = 'level'
+
+# index: sample index of the trigger, data: (rows, pre + post) samples
+Window = namedtuple('Window', 'index data')
+
+class SoftwareTrigger(object):
+    '''Finds trigger events in chunks of samples; see module document'''
+    def __init__(self, level=0.0, trigtype=TRIGTYPE.EDGE,
+                 trigcond=TRIGCOND.RISING_POSITIVE, hysteresis=0.0,
+                 length=0, triglen=TRIGLEN.LESS, holdoff=1):
+        self.level = level
+        self.trigtype = trigtype
+        self.trigcond = trigcond
+        self.hysteresis = hysteresis
+        self.length = length
+        self.triglen = triglen
+        self.holdoff = max(holdoff, 1)
+        self.samples = 0
+        self._state = -1 # unknown, 0 inactive, 1 active
+        self._open = None # start of the active pulse
+        self._inactive = None # last inactive sample
+        self._next = 0 # the next event is not before this
+
+    def _states(self, x):
+        if self.trigcond == TRIGCOND.RISING_POSITIVE:
+            active = x >= self.level
+            inactive = x < self.level - self.hysteresis
+        else:
+            active = x <= self.level
+            inactive = x > self.level + self.hysteresis
+        last = _np.where(active | inactive, _np.arange(len(x)), -1)
+        _np.maximum.accumulate(last, out=last)
+        state = _np.where(last >= 0,
+                          active[_np.maximum(last, 0)], self._state)
+        return state.astype(_np.int8), inactive
+
+    def find(self, samples):
+        '''Returns sample indices of events in samples'''
+        x = _np.asarray(samples, dtype=float)
+        base = self.samples
+        self.samples += len(x)
+        if len(x) == 0:
+            return _np.zeros(0, dtype=_np.int64)
+        state, inactive = self._states(x)
+        before = _np.concatenate([ [ self._state ], state[:-1] ])
+        starts = _np.flatnonzero((state == 1) & (before == 0)) + base
+        ends = _np.flatnonzero((state == 0) & (before == 1)) + base
+        inactive = _np.flatnonzero(inactive) + base
+        if self.trigtype == LEVEL:
+            events = _np.flatnonzero(state == 1) + base
+        elif self.trigtype == TRIGTYPE.PULSE:
+            events = self._pulses(starts, ends, base, base + len(x))
+        elif self.trigtype == TRIGTYPE.TRANSITION:
+            events = self._transitions(starts, inactive)
+        else:
+            events = starts
+        self._state = state[-1]
+        if len(inactive):
+            self._inactive = inactive[-1]
+        return self._hold(events)
+
+    def _pulses(self, starts, ends, begin, end):
+        # pair each end of pulse with its start
+        if self._open is not None and (not len(starts) or
+                                       (len(ends) and ends[0] < starts[0])):
+            starts = _np.concatenate([ [ self._open ], starts ])
+        if len(ends) and len(starts) and ends[0] < starts[0]:
+            ends = ends[1:] # the start is unknown
+        closed = starts[:len(ends)]
+        self._open = starts[-1] if len(starts) > len(ends) else None
+        width = ends - closed
+        if self.triglen == TRIGLEN.LESS:
+            return ends[width < self.length]
+        if self.triglen == TRIGLEN.MORE:
+            return ends[width > self.length]
+        # TIMEOUT: length samples after the start, in this chunk
+        limit = _np.append(ends, end if self._open is not None else [])
+        timeout = starts[:len(limit)] + self.length
+        found = (timeout < limit) & (timeout >= begin) & (timeout < end)
+        return timeout[found]
+
+    def _transitions(self, starts, inactive):
+        if self._inactive is not None:
+            inactive = _np.concatenate([ [ self._inactive ], inactive ])
+        last = _np.searchsorted(inactive, starts) - 1
+        starts = starts[last >= 0]
+        duration = starts - inactive[last[last >= 0]] - 1
+        if self.triglen == TRIGLEN.LESS:
+            return starts[duration <= self.length]
+        return starts[duration > self.length]
+
+    def _hold(self, events):
+        # an event is kept if it is holdoff samples or more after the last
+        # kept one; events are sorted and unique
+        events = _np.asarray(events[_np.searchsorted(events, self._next):],
+                             dtype=_np.int64)
+        if len(events) == 0:
+            return events
+        hold = self.holdoff
+        if hold > 1:
+            events = events[self._held(events, hold)]
+        self._next = events[-1] + hold
+        return events
+
+    def _held(self, events, hold):
+        # indices of kept events: the first event of each cluster (events
+        # closer than hold) is kept, and clusters of several events are
+        # walked by runs of consecutive samples
+        gaps = _np.diff(events)
+        first = _np.flatnonzero(_np.concatenate([ [ True ], gaps >= hold ]))
+        last = _np.append(first[1:], len(events)) - 1
+        several = first < last
+        if not several.any():
+            return first
+        ends = _np.append(_np.flatnonzero(gaps != 1), len(events) - 1)
+        kept = [ first[~several] ]
+        for i, end in zip(first[several], last[several]):
+            while i <= end:
+                run = ends[_np.searchsorted(ends, i)]
+                count = (run - i) // hold + 1
+                kept.append(_np.arange(i, i + count * hold, hold))
+                i = _np.searchsorted(events, events[kept[-1][-1]] + hold)
+        return _np.sort(_np.concatenate(kept))
+
+class TriggerWindows(object):
+    '''Streaming stage: feed() returns Windows of chunks of a record
+    stream (shape (rows, n), or (n,)) around events of trigger on row.
+    The last pre samples are kept for the next chunk; an event with
+    fewer samples before it is counted in skipped.'''
+    def __init__(self, trigger, pre=0, post=1, row=0):
+        self.trigger = trigger
+        self.pre = pre
+        self.post = post
+        self.row = row
+        self.skipped = 0
+        self._history = None
+        self._pending = [] # [index, data, filled]
+
+    def feed(self, chunk):
+        rows = _np.asarray(chunk)
+        if rows.ndim == 1:
+            rows = rows.reshape(1, -1)
+        size = self.pre + self.post
+        windows = []
+        pending = []
+        for index, data, filled in self._pending:
+            count = min(size - filled, rows.shape[1])
+            data[:, filled:filled + count] = rows[:, :count]
+            if filled + count == size:
+                windows.append(Window(index, data))
+            else:
+                pending.append([ index, data, filled + count ])
+        if self._history is None:
+            self._history = rows[:, :0]
+        events = self.trigger.find(rows[self.row])
+        stream = _np.concatenate([ self._history, rows ], axis=1)
+        first = self.trigger.samples - stream.shape[1]
+        for index in events:
+            start = index - self.pre - first
+            if start < 0:
+                self.skipped += 1
+                continue
+            data = _np.empty((rows.shape[0], size), dtype=rows.dtype)
+            count = min(size, stream.shape[1] - start)
+            data[:, :count] = stream[:, start:start + count]
+            if count == size:
+                windows.append(Window(index, data))
+            else:
+                pending.append([ index, data, count ])
+        self._pending = pending
+        self._history = stream[:, max(0, stream.shape[1] - self.pre):].copy()
+        return windows
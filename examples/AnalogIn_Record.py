@@ -11,6 +11,7 @@
 """
 
 import dwf
+from dwf.capture import CaptureWriter, CaptureReader
 import time
 import matplotlib.pyplot as plt
 
@@ -46,46 +47,20 @@ dwf_ai.recordLengthSet(N_SAMPLES / HZ_ACQ)
 time.sleep(2)
 
 #begin acquisition
-dwf_ai.configure(False, True)
 print("   waiting to finish")
 
-rgdSamples = []
-cSamples = 0
-fLost = False
-fCorrupted = False
-while cSamples < N_SAMPLES:
-    sts = dwf_ai.status(True)
-    if cSamples == 0 and sts in (dwf_ai.STATE.CONFIG,
-                                 dwf_ai.STATE.PREFILL,
-                                 dwf_ai.STATE.ARMED):
-        # Acquisition not yet started.
-        continue
-
-    cAvailable, cLost, cCorrupted = dwf_ai.statusRecord()
-    cSamples += cLost
-        
-    if cLost > 0:
-        fLost = True
-    if cCorrupted > 0:
-        fCorrupted = True
-    if cAvailable == 0:
-        continue
-    if cSamples + cAvailable > N_SAMPLES:
-        cAvailable = N_SAMPLES - cSamples
-    
-    # get samples
-    rgdSamples.extend(dwf_ai.statusData(0, cAvailable))
-    cSamples += cAvailable
+record = dwf_ai.record(samples=N_SAMPLES)
+with CaptureWriter.for_record("record.dwfcap", record) as f:
+    for chunk in record:
+        # chunk[0] is samples of channel 0
+        f.write(chunk)
 
 print("Recording finished")
-if fLost:
+if record.lost:
     print("Samples were lost! Reduce frequency")
-if cCorrupted:
+if record.corrupted:
     print("Samples could be corrupted! Reduce frequency")
 
-with open("record.csv", "w") as f:
-    for v in rgdSamples:
-        f.write("%s\n" % v)
-  
-plt.plot(rgdSamples)
-plt.show()
+with CaptureReader("record.dwfcap") as f:
+    plt.plot(f.channel(0))
+    plt.show()
@@ -56,16 +56,15 @@ dwf_ai.configure(False, True)
 plt.axis([0, N_SAMPLES, -2.5, 2.5])
 plt.ion()
 hl, = plt.plot([], [])
-hl.set_xdata(np.arange(0, N_SAMPLES))
 
+# reads only new samples on each update
+scan = dwf_ai.scan()
 while True:
-    sts = dwf_ai.status(True)
-
-    cValid = dwf_ai.statusSamplesValid()
+    scan.update()
 
     # get samples
-    rgdSamples = dwf_ai.statusData(0, cValid)
-    print(cValid)
-    hl.set_ydata(rgdSamples)
+    rgdSamples = scan.shift()[0]
+    print(scan.valid)
+    hl.set_data(np.arange(len(rgdSamples)), rgdSamples)
     plt.draw()
     plt.pause(0.01)
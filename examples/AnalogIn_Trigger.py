@@ -24,37 +24,33 @@ dwf_ai = dwf.DwfAnalogIn()
 
 print("Preparing to read sample...")
 
-#set up acquisition
-dwf_ai.frequencySet(20e6)
-dwf_ai.bufferSizeSet(8192)
-dwf_ai.channelEnableSet(0, True)
-dwf_ai.channelRangeSet(0, 5.0)
-
-#set up trigger
-dwf_ai.triggerAutoTimeoutSet() #disable auto trigger
-dwf_ai.triggerSourceSet(dwf_ai.TRIGSRC.DETECTOR_ANALOG_IN)
-dwf_ai.triggerTypeSet(dwf_ai.TRIGTYPE.EDGE)
-dwf_ai.triggerChannelSet(0)
-dwf_ai.triggerLevelSet(1.5) # 1.5V
-dwf_ai.triggerConditionSet(dwf_ai.TRIGCOND.RISING_POSITIVE)
+#set up acquisition and trigger
+cfg = dwf.DwfConfig(
+    frequency=20e6,
+    bufferSize=8192,
+    channelEnable={ 0: True },
+    channelRange={ 0: 5.0 },
+    triggerAutoTimeout=0, #disable auto trigger
+    triggerSource=dwf_ai.TRIGSRC.DETECTOR_ANALOG_IN,
+    triggerType=dwf_ai.TRIGTYPE.EDGE,
+    triggerChannel=0,
+    triggerLevel=1.5, # 1.5V
+    triggerCondition=dwf_ai.TRIGCOND.RISING_POSITIVE)
+dwf_ai.apply(cfg)
 
 # wait at least 2 seconds with Analog Discovery for the offset to stabilize,
 # before the first reading after device open or offset/range change
 time.sleep(2)
 
 print("   starting repeated acquisitions")
-for iTrigger in range(100):
-    #begin acquisition
-    dwf_ai.configure(False, True)
+# re-armed right after each trigger, segments.data[0][i] is i-th one
+segments = dwf_ai.segments(100, channels=[0])
 
-    while True:
-        if dwf_ai.status(True) == dwf_ai.STATE.DONE:
-            break
-        time.sleep(0.001)
-
-    rgdSamples = dwf_ai.statusData(0, 8192)
-    
+for iTrigger in range(segments.count):
+    rgdSamples = segments.data[0][iTrigger]
     dc = sum(rgdSamples) / len(rgdSamples)
     print("Acquisition #" + str(iTrigger+1) + " average: " + str(dc) + "V")
+print("trigger rate: %.1f/s, dead time: %.6fs" %
+      (segments.trigger_rate(), segments.dead_time()))
 
 dwf_ai.close()
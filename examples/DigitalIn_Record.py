@@ -13,6 +13,7 @@
 """
 
 import dwf
+from dwf.capture import CaptureWriter
 import math
 
 #print DWF version
@@ -50,48 +51,19 @@ dwf_di.triggerSourceSet(dwf_di.TRIGSRC.DETECTOR_DIGITAL_IN)
 dwf_di.triggerSet(0xFFFF,  0x0000, 0x0000, 0x0000)
 
 # begin acquisition
-dwf_di.configure(False, True)
-
 print("Starting record")
 
-cSamples = 0
-rgwSamples = []
-fLost = False
-fCorrupted = False
-while cSamples < N_SAMPLES:
-    sts = dwf_di.status(True)
-    if cSamples == 0 and sts in (dwf_di.STATE.CONFIG,
-                                 dwf_di.STATE.PREFILL,
-                                 dwf_di.STATE.ARMED):
-        # acquisition not yet started.
-        continue
-    
-    cAvailable, cLost, cCorrupted = dwf_di.statusRecord()
-    cSamples += cLost
-    
-    if cLost > 0:
-        fLost = True
-    if cCorrupted > 0:
-        fCorrupted = True
-    if cAvailable == 0:
-        continue
-    
-    if cSamples + cAvailable > N_SAMPLES:
-        cAvailable = N_SAMPLES - cSamples
-    
-    # get samples
-    rgwSamples.extend(dwf_di.statusData(cAvailable))
-    cSamples += cAvailable
+record = dwf_di.record(samples=N_SAMPLES)
+with CaptureWriter.for_record("record.dwfcap", record) as f:
+    for chunk in record:
+        f.write(chunk)
 
 dwf_do.close()
 dwf_di.close()
 
 print("Recording finished")
-if fLost:
+if record.lost:
     print("Samples were lost! Reduce sample rate")
-if fCorrupted:
+if record.corrupted:
     print("Samples could be corrupted! Reduce sample rate")
 
-with open("record.csv", "w") as f:
-    for v in rgwSamples:
-        f.write("%s\n" % v)
@@ -50,7 +50,7 @@ rgdSamples = [0x00, 0xAA, 0x66, 0xFF]
 dwf_do.enableSet(3, 1)
 dwf_do.typeSet(3, dwf_do.TYPE.CUSTOM)
 dwf_do.dividerSet(3, int(hzSys / 1e3))
-dwf_do.dataSet(3, dwf.create_bitdata_stream(rgdSamples, 8))
+dwf_do.dataSet(3, dwf.encode_bitdata_stream(rgdSamples, 8))
 
 dwf_do.configure(True)
 
@@ -58,7 +58,7 @@ dwf_do.dividerInitSet(0, int((1+0.5*CPHA)*hzSys/hzFreq))
 # SPI frequency, bit frequency
 dwf_do.dividerSet(0, int(hzSys / hzFreq))
 # data sent out LSB first
-dwf_do.dataSet(0, dwf.create_bitdata_stream(rgdData, 8))
+dwf_do.dataSet(0, dwf.encode_bitdata_stream(rgdData, 8))
 
 dwf_do.configure(True)
 print("Generating SPI signal")
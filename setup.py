@@ -23,6 +23,9 @@ setup(
     install_requires=[
         'enum34'
     ],
+    extras_require={
+        'numpy': ['numpy'],
+    },
     classifiers=[
         'Development Status :: 3 - Alpha',
         
@@ -44,6 +47,6 @@ setup(
         'Programming Language :: Python :: 3.5',        
     ],
     platforms="Linux,Mac,Windows",
-    packages=['dwf'],
+    packages=['dwf', 'dwf.decode'],
     use_2to3=False
 )